@@ -1,609 +1,1284 @@
-# -*- coding: utf-8 -*- # 指定编码为 UTF-8
-import streamlit as st
-import pandas as pd
-import numpy as np
-import joblib
-import os
-
-# --- 页面基础配置 ---
-st.set_page_config(
-    page_title="盐城市二手房智能分析器",
-    page_icon="🏠",
-    layout="wide",
-    initial_sidebar_state="auto"
-)
-
-# --- 常量定义：模型和资源文件路径 ---
-# 获取脚本所在目录
-try:
-    # 在作为脚本运行时有效
-    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-except NameError:
-    # 在 __file__ 未定义的 环境（如 Streamlit sharing）中的备用方案
-    CURRENT_DIR = os.getcwd()
-
-MARKET_MODEL_PATH = os.path.join(CURRENT_DIR, 'market_segment_lgbm_model.joblib')
-PRICE_LEVEL_MODEL_PATH = os.path.join(CURRENT_DIR, 'price_level_rf_model.joblib')
-REGRESSION_MODEL_PATH = os.path.join(CURRENT_DIR, 'unit_price_rf_model.joblib')
-SCALER_PATH = os.path.join(CURRENT_DIR, 'regression_scaler.joblib')
-FEATURE_NAMES_PATH = os.path.join(CURRENT_DIR, 'feature_names.joblib')
-MAPPINGS_PATH = os.path.join(CURRENT_DIR, 'mappings.joblib')
-
-# --- ***** 新增：定义均价预测模型所需的固定特征列表 ***** ---
-# ***** 注意：这里的特征列表必须与训练回归模型和Scaler时使用的特征完全一致，包括顺序 *****
-REQUIRED_REGRESSION_FEATURES = ['所属区域', '房龄', '面积(㎡)', '楼层数', '建造时间', '室', '厅', '卫']
-print(f"代码指定均价预测特征: {REQUIRED_REGRESSION_FEATURES}") # 记录此规范
-
-# --- 加载资源函数 (使用缓存) ---
-@st.cache_resource
-def load_resources():
-    """加载所有必要的资源文件 (模型, scaler, 特征名, 映射关系)。"""
-    resources = {}
-    all_files_exist = True
-    required_files = [MARKET_MODEL_PATH, PRICE_LEVEL_MODEL_PATH, REGRESSION_MODEL_PATH,
-                      SCALER_PATH, FEATURE_NAMES_PATH, MAPPINGS_PATH]
-    missing_files = []
-    for file_path in required_files:
-        if not os.path.exists(file_path):
-            print(f"错误: 文件 {file_path} 未找到。")
-            missing_files.append(os.path.basename(file_path)) # 仅显示文件名
-            all_files_exist = False
-    if not all_files_exist:
-        print(f"错误：缺少文件 {missing_files}。请确保所有 .joblib 文件与 app.py 在同一目录。")
-        return None, missing_files
-    try:
-        resources['market_model'] = joblib.load(MARKET_MODEL_PATH)
-        resources['price_level_model'] = joblib.load(PRICE_LEVEL_MODEL_PATH)
-        resources['regression_model'] = joblib.load(REGRESSION_MODEL_PATH)
-        resources['scaler'] = joblib.load(SCALER_PATH)
-        resources['feature_names'] = joblib.load(FEATURE_NAMES_PATH)
-        resources['mappings'] = joblib.load(MAPPINGS_PATH)
-        print("所有资源加载成功。")
-
-        # --- 验证 feature_names.joblib 中的回归特征 ---
-        loaded_reg_features = resources.get('feature_names', {}).get('regression')
-        if loaded_reg_features:
-            print(f"从 {os.path.basename(FEATURE_NAMES_PATH)} 加载的 'regression' 特征: {loaded_reg_features}")
-            if set(loaded_reg_features) != set(REQUIRED_REGRESSION_FEATURES):
-                 print(f"警告: 从 {os.path.basename(FEATURE_NAMES_PATH)} 加载的 'regression' 特征与代码中指定的 ({REQUIRED_REGRESSION_FEATURES}) 不完全匹配。将优先使用代码中指定的列表。")
-                 # ***** 关键：检查 Scaler 是否与代码指定的特征匹配 *****
-                 if hasattr(resources['scaler'], 'n_features_in_') and resources['scaler'].n_features_in_ != len(REQUIRED_REGRESSION_FEATURES):
-                      error_msg = f"严重错误: Scaler (来自 {os.path.basename(SCALER_PATH)}) 期望 {resources['scaler'].n_features_in_} 个特征, 但代码指定了 {len(REQUIRED_REGRESSION_FEATURES)} 个回归特征 ({REQUIRED_REGRESSION_FEATURES})。请确保 Scaler 与指定的特征列表一致。"
-                      print(error_msg)
-                      # 返回 None 以模拟此不匹配导致的加载失败
-                      return None, [error_msg]
-                 else:
-                    print(f"从 {os.path.basename(FEATURE_NAMES_PATH)} 加载的 'regression' 特征与代码指定一致。")
-        else:
-            print(f"警告: 在 {os.path.basename(FEATURE_NAMES_PATH)} 中未找到 'regression' 特征列表。将使用代码中指定的列表: {REQUIRED_REGRESSION_FEATURES}")
-             # ***** 关键：同样检查 Scaler *****
-            if hasattr(resources['scaler'], 'n_features_in_') and resources['scaler'].n_features_in_ != len(REQUIRED_REGRESSION_FEATURES):
-                error_msg = f"严重错误: Scaler (来自 {os.path.basename(SCALER_PATH)}) 期望 {resources['scaler'].n_features_in_} 个特征, 但代码指定了 {len(REQUIRED_REGRESSION_FEATURES)} 个回归特征 ({REQUIRED_REGRESSION_FEATURES})。请确保 Scaler 与指定的特征列表一致。"
-                print(error_msg)
-                return None, [error_msg]
-
-        return resources, None
-    except Exception as e:
-        print(f"加载资源时发生错误: {e}")
-        return None, [f"加载错误: {e}"]
-
-resources, load_error_info = load_resources()
-
-# --- 辅助函数 ---
-def format_mapping_options_for_selectbox(name_to_code_mapping):
-    """为 Streamlit Selectbox 准备选项和格式化函数所需的数据, 增加 '无' 选项。"""
-    if not isinstance(name_to_code_mapping, dict):
-        print(f"[格式化错误] 输入非字典: {type(name_to_code_mapping)}")
-        return {} # 出错时返回空字典
-
-    code_to_display_string = {None: "无 (不适用)"} # 首先添加 '无' 选项
-
-    try:
-        # 添加前对原始映射项进行排序
-        try:
-            # 尝试按整数代码排序
-            sorted_items = sorted(name_to_code_mapping.items(), key=lambda item: int(item[1]))
-        except ValueError:
-             # 如果整数转换失败，则回退到按字符串代码排序
-            # print(f"[格式化警告] 无法将所有 code 转换为 int 进行排序，将按字符串排序: {name_to_code_mapping}")
-             sorted_items = sorted(name_to_code_mapping.items(), key=lambda item: str(item[1]))
-
-        for name, code in sorted_items:
-            try:
-                code_key = int(code) # Selectbox 选项通常需要原始类型
-            except ValueError:
-                code_key = str(code) # 如果无法转换为整数，则保留为字符串
-
-            name_str = str(name)
-            code_to_display_string[code_key] = f"{name_str}" # 只显示名称
-
-        return code_to_display_string
-
-    except (TypeError, KeyError, Exception) as e: # 捕获处理过程中的更广泛错误
-        print(f"[格式化错误] 转换/排序映射时出错 ({name_to_code_mapping}): {e}")
-        # 备用方案：如果排序/转换失败，仅返回 '无' 选项
-        return {None: "无 (不适用)"}
-
-
-# --- Streamlit 用户界面主要部分 ---
-st.title("🏠 盐城市二手房智能分析与预测")
-st.markdown("""
-欢迎使用盐城市二手房分析工具！请在左侧边栏输入房产特征，我们将为您提供三个维度的预测：
-1.  **市场细分预测**: 判断房产属于低端、中端还是高端市场
-2.  **价格水平预测**: 判断房产单价是否高于其所在区域的平均水平
-3.  **房产均价预测**: 预测房产的每平方米单价（元/㎡）
-""")
-st.markdown("---")
-
-# --- 应用启动时资源加载失败或映射缺失的处理 ---
-if not resources:
-     st.error("❌ **应用程序初始化失败！**")
-     if load_error_info:
-         st.warning(f"无法加载必要的资源文件。错误详情:")
-         for error in load_error_info:
-             st.markdown(f"*   `{error}`")
-             # 为缩放器不匹配提供具体指导
-             if "Scaler" in error and "特征" in error:
-                 st.info(f"💡 **提示:** 上述错误表明用于均价预测的特征缩放器 (`{os.path.basename(SCALER_PATH)}`) 与代码中指定的特征列表 (`{REQUIRED_REGRESSION_FEATURES}`) 不匹配。您需要：\n    1. 确认代码中的 `REQUIRED_REGRESSION_FEATURES` 列表是正确的。\n    2. 使用 **完全相同** 的特征和 **顺序** 重新训练并保存 `regression_scaler.joblib` 文件。")
-     else:
-         st.warning("无法找到一个或多个必需的资源文件。")
-     st.markdown(f"""
-        请检查以下几点：
-        *   确认以下所有 `.joblib` 文件都与 `app.py` 文件在 **同一个** 目录下:
-            *   `{os.path.basename(MARKET_MODEL_PATH)}`
-            *   `{os.path.basename(PRICE_LEVEL_MODEL_PATH)}`
-            *   `{os.path.basename(REGRESSION_MODEL_PATH)}`
-            *   `{os.path.basename(SCALER_PATH)}`
-            *   `{os.path.basename(FEATURE_NAMES_PATH)}`
-            *   `{os.path.basename(MAPPINGS_PATH)}`
-        *   确保 `{os.path.basename(MAPPINGS_PATH)}` 和 `{os.path.basename(FEATURE_NAMES_PATH)}` 文件内容有效。
-        *   检查运行 Streamlit 的终端是否有更详细的错误信息。
-     """)
-     st.stop()
-
-# --- 如果资源加载成功 ---
-mappings = resources['mappings']
-feature_names_loaded = resources.get('feature_names', {}) # 使用 .get 以确保安全
-market_model = resources['market_model']
-price_level_model = resources['price_level_model']
-regression_model = resources['regression_model']
-scaler = resources['scaler']
-
-# 检查核心映射和特征列表是否存在且为预期类型
-required_mappings = ['方位', '楼层', '所属区域', '房龄', '市场类别', '是否高于区域均价']
-required_features_in_file = ['market', 'price_level'] # 回归特征单独处理
-valid_resources = True
-missing_or_invalid = []
-
-for key in required_mappings:
-    if key not in mappings or not isinstance(mappings.get(key), dict):
-        missing_or_invalid.append(f"映射 '{key}' (来自 {os.path.basename(MAPPINGS_PATH)})")
-        valid_resources = False
-
-for key in required_features_in_file:
-    # feature_names 的值应该是一个列表
-    if key not in feature_names_loaded or not isinstance(feature_names_loaded.get(key), list):
-        missing_or_invalid.append(f"特征列表 '{key}' (来自 {os.path.basename(FEATURE_NAMES_PATH)})")
-        valid_resources = False
-# 检查回归键是否存在，即使稍后覆盖它，它也可能指示问题
-if 'regression' not in feature_names_loaded:
-     print(f"信息: 'regression' 键未在 {os.path.basename(FEATURE_NAMES_PATH)} 中找到。将使用代码中定义的特征列表。")
-elif not isinstance(feature_names_loaded.get('regression'), list):
-     missing_or_invalid.append(f"特征列表 'regression' (来自 {os.path.basename(FEATURE_NAMES_PATH)}) 格式无效 (应为列表)")
-     valid_resources = False
-
-
-if not valid_resources:
-    st.error(f"❌ 资源文件内容不完整或格式错误。缺少或无效的项目:")
-    for item in missing_or_invalid:
-        st.markdown(f"*   {item}")
-    st.stop()
-
-# --- 侧边栏输入控件 ---
-st.sidebar.header("🏘️ 房产特征输入")
-
-# --- ***** 修改：字典，将内部特征名映射到用户界面标签 ***** ---
-feature_to_label = {
-    # 选择项
-    '方位': "房屋方位:",
-    '楼层': "楼层位置:",
-    '所属区域': "所属区域:",
-    '房龄': "房龄:",
-    # 数值项
-    '总价(万)': "总价 (万):",
-    '面积(㎡)': "面积 (㎡):",
-    '建造时间': "建造时间 (年份):",
-    '楼层数': "总楼层数:",
-    '室': "室:",
-    '厅': "厅:",
-    '卫': "卫:"
-}
-
-selectbox_inputs = {}
-selectbox_labels_map = {} # 用于在需要时将内部键映射回显示标签
-all_select_valid = True # 跟踪所有下拉框是否正确加载选项
-
-st.sidebar.subheader("选择项特征")
-# 封装下拉框创建逻辑
-def create_selectbox(internal_key, help_text, key_suffix):
-    global all_select_valid # 允许修改全局标志
-    label = feature_to_label.get(internal_key, internal_key) # 从映射中获取标签
-    try:
-        options_map = mappings[internal_key]
-        # 生成包含 '无' 选项的显示映射
-        display_map = format_mapping_options_for_selectbox(options_map)
-
-        if not display_map or len(display_map) <= 1: # 应包含 '无' 和至少一个其他选项
-             st.sidebar.warning(f"'{label}' 缺少有效选项 (除了'无')。请检查 {os.path.basename(MAPPINGS_PATH)} 中的 '{internal_key}'。")
-             if not display_map:
-                 display_map = {None: "无 (加载失败)"} # 提供备用方案
-
-        options_codes = list(display_map.keys()) # 键包括 None 和实际代码
-
-        # 确定默认索引 - 尽量避免将 '无' 作为默认值
-        default_index = 0 # 如果没有其他选项或逻辑适用，则默认为 '无'
-        if len(options_codes) > 1:
-            common_defaults = {'楼层': 1, '房龄': 2} # 示例：默认为中间楼层，6-10年
-            target_default_code = common_defaults.get(internal_key)
-
-            if target_default_code is not None and target_default_code in options_codes:
-                try:
-                    default_index = options_codes.index(target_default_code)
-                except ValueError:
-                    print(f"警告: 找不到用于 {internal_key} 的默认代码 {target_default_code}，选项为 {options_codes}。使用默认值。")
-                    default_index = 1 # 默认为第一个非 '无' 的选项
-            # 基于选项数量的更智能的默认索引
-            elif len(options_codes) > 3: # 选项较多时，选择中间附近的
-                 default_index = (len(options_codes) -1) // 2 + 1 # '无' 之后的索引
-            elif len(options_codes) >= 2: # 除了 '无' 之外只有一个选项
-                default_index = 1 # 选择第一个实际选项
-
-        selected_value = st.sidebar.selectbox(
-            label,
-            options=options_codes,
-            index=default_index,
-            format_func=lambda x: display_map.get(x, f"未知 ({x})"),
-            key=f"{key_suffix}_select",
-            help=help_text
-        )
-        selectbox_labels_map[internal_key] = label # 存储键到标签的映射
-        return selected_value
-    except Exception as e:
-        st.sidebar.error(f"加载 '{label}' 选项时出错: {e}")
-        print(f"加载 {label} 出错的详细信息: {e}") # 在控制台打印详细错误
-        all_select_valid = False
-        return None
-
-# 使用函数创建下拉选择框
-selectbox_inputs['方位'] = create_selectbox('方位', "选择房屋的主要朝向。选择 '无' 如果不确定或不适用。", "orientation")
-selectbox_inputs['楼层'] = create_selectbox('楼层', "选择房屋所在楼层的大致位置。选择 '无' 如果不确定或不适用。", "floor_level")
-selectbox_inputs['所属区域'] = create_selectbox('所属区域', "选择房产所在的行政区域或板块。选择 '无' 如果不确定或不适用。", "district")
-selectbox_inputs['房龄'] = create_selectbox('房龄', "选择房屋的建造年限范围。选择 '无' 如果不确定或不适用。", "age")
-
-# --- ***** 修改：数值输入控件，增加 "无" 选项 ***** ---
-st.sidebar.subheader("数值项特征")
-numeric_inputs = {}
-numeric_input_states = {} # 用于存储状态 ('输入数值' 或 '无')
-
-# 定义默认数值（仅在选择 '输入数值' 时使用）
-default_numeric_values = {
-    '总价(万)': 120.0,
-    '面积(㎡)': 100.0,
-    '建造时间': 2018,
-    '楼层数': 30,
-    '室': 3,
-    '厅': 2,
-    '卫': 2
-}
-
-# 定义数值输入参数
-numeric_params = {
-    '总价(万)': {'min_value': 0.0, 'max_value': 10000.0, 'step': 5.0, 'format': "%.1f", 'help': "输入房产的总价，单位万元。留空或选择 '无' 表示不适用。"},
-    '面积(㎡)': {'min_value': 1.0, 'max_value': 2000.0, 'step': 1.0, 'format': "%.1f", 'help': "输入房产的建筑面积，单位平方米。留空或选择 '无' 表示不适用。"},
-    '建造时间': {'min_value': 1900, 'max_value': 2025, 'step': 1, 'format': "%d", 'help': "输入房屋的建造年份。留空或选择 '无' 表示不适用。"},
-    '楼层数': {'min_value': 1, 'max_value': 100, 'step': 1, 'format': "%d", 'help': "输入楼栋的总楼层数。留空或选择 '无' 表示不适用。"},
-    '室': {'min_value': 0, 'max_value': 20, 'step': 1, 'format': "%d", 'help': "输入卧室数量。留空或选择 '无' 表示不适用。"},
-    '厅': {'min_value': 0, 'max_value': 10, 'step': 1, 'format': "%d", 'help': "输入客厅/餐厅数量。留空或选择 '无' 表示不适用。"},
-    '卫': {'min_value': 0, 'max_value': 10, 'step': 1, 'format': "%d", 'help': "输入卫生间数量。留空或选择 '无' 表示不适用。"}
-}
-
-# 为数值特征创建组合输入小部件
-for key, label in feature_to_label.items():
-    if key in numeric_params: # 检查是否是我们处理的数值特征
-        param = numeric_params[key]
-        default_val = default_numeric_values[key]
-        key_suffix = key.replace('(','').replace(')','').replace('㎡','') # 创建一个简单的键后缀
-
-        # 用于选择输入值或指定 '无' 的选择器
-        numeric_input_states[key] = st.sidebar.selectbox(
-            label, # 使用 feature_to_label 中定义的标签
-            options=["输入数值", "无"],
-            index=0,  # 默认为 "输入数值"
-            key=f"{key_suffix}_selector",
-            help=param['help']
-        )
-
-        # 条件性地显示数字输入框
-        if numeric_input_states[key] == "输入数值":
-            numeric_inputs[key] = st.sidebar.number_input(
-                f"输入 {label}", # 稍微修改标签以更清晰
-                min_value=param['min_value'],
-                max_value=param['max_value'],
-                value=default_val,
-                step=param['step'],
-                format=param['format'],
-                key=f"{key_suffix}_value",
-                label_visibility="collapsed" # 隐藏标签，因为它已由选择器隐含
-            )
-        else:
-            # 如果选择了 "无 (不适用)"，则为此特征存储 None
-            numeric_inputs[key] = None
-            # 可选地，显示禁用的占位符或不显示任何内容
-            # st.sidebar.text_input(f"{label}", value="不适用", disabled=True, key=f"{key_suffix}_value_disabled")
-
-
-# --- 预测触发按钮 ---
-st.sidebar.markdown("---")
-predict_button_disabled = not all_select_valid # 即使某些数值为 None 仍可预测
-predict_button_help = "点击这里根据输入的特征进行预测分析" if all_select_valid else "部分下拉框选项加载失败，无法进行预测。请检查资源文件或错误信息。"
-
-if st.sidebar.button("🚀 开始分析预测", type="primary", use_container_width=True, help=predict_button_help, disabled=predict_button_disabled):
-
-    # --- ***** 修改：整合输入时处理 None 值 ***** ---
-    # 从下拉选择框输入开始
-    all_inputs = {**selectbox_inputs}
-    # 添加数值输入，尊重来自选择器的 'None' 状态
-    for key, state in numeric_input_states.items():
-        if state == "无":
-            all_inputs[key] = None # 如果选择了 '无' 则存储 None
-        else:
-            # 从相应的 number_input 小部件检索值
-            key_suffix = key.replace('(','').replace(')','').replace('㎡','')
-            all_inputs[key] = st.session_state[f"{key_suffix}_value"] # 使用其键获取值
-
-    print("Combined inputs for prediction:", all_inputs) # 调试输出
-
-    # --- 初始化结果变量 ---
-    market_pred_label = "等待计算..."
-    price_level_pred_label = "等待计算..."
-    price_level_pred_code = -99 # 对 '未预测' 或 '错误' 使用不同的代码
-    unit_price_pred = -1.0 # 对 '未预测' 或 '错误' 使用 -1.0
-    error_messages = []
-    insufficient_data_flags = {'market': False, 'price_level': False, 'regression': False}
-
-    # --- ***** 修改：Helper Function to Check Input Sufficiency (Handles None) ***** ---
-    def check_sufficiency(model_key, required_feature_list):
-        """检查模型所需的所有特征是否具有有效（非 None）值。"""
-        missing_for_model = []
-        for feat in required_feature_list:
-            # 检查特征是否存在于组合输入中，以及其值是否为 None
-            if feat not in all_inputs:
-                 # 这是一个关键配置错误 - 所需特征未在 UI 中定义！
-                 print(f"严重警告: 模型 '{model_key}' 需要的特征 '{feat}' 在UI输入中未定义!")
-                 missing_for_model.append(f"{feature_to_label.get(feat, feat)} (UI未定义)")
-            elif all_inputs[feat] is None:
-                # 特征存在，但其值为 None（用户选择了 '无' 或加载失败）
-                missing_for_model.append(feature_to_label.get(feat, feat)) # 使用显示标签
-
-        if missing_for_model:
-            print(f"模型 '{model_key}' 数据不足，缺少: {missing_for_model}")
-            insufficient_data_flags[model_key] = True
-            return False # 数据不足
-        return True # 数据充足
-
-
-    # --- 1. 市场细分预测 ---
-    market_features_needed = feature_names_loaded.get('market', [])
-    if not market_features_needed:
-         st.warning("警告: 未在 feature_names.joblib 中找到 'market' 模型的特征列表，无法进行市场细分预测。")
-         insufficient_data_flags['market'] = True # 标记为不足
-         market_pred_label = "配置缺失" # 特定状态
-    elif check_sufficiency('market', market_features_needed):
-        try:
-            # 仅筛选此模型所需的非 None 输入
-            input_data_market = {feat: all_inputs[feat] for feat in market_features_needed}
-            input_df_market = pd.DataFrame([input_data_market])[market_features_needed] # 确保顺序
-            market_pred_code = market_model.predict(input_df_market)[0]
-            market_output_map_raw = mappings.get('市场类别', {})
-            # 确保预测代码被视为正确的类型以进行映射查找
-            market_pred_key = int(market_pred_code) if isinstance(market_pred_code, (int, np.integer, float)) else str(market_pred_code)
-            market_pred_label = market_output_map_raw.get(market_pred_key, f"未知编码 ({market_pred_key})")
-        except Exception as e:
-            msg = f"市场细分模型预测时发生错误: {e}"
-            print(msg)
-            error_messages.append(msg)
-            market_pred_label = "预测失败" # 指示运行时错误
-    else:
-        # check_sufficiency 返回 False
-        market_pred_label = "数据不足"
-
-    # --- 2. 价格水平预测 ---
-    price_level_features_needed = feature_names_loaded.get('price_level', [])
-    if not price_level_features_needed:
-        st.warning("警告: 未在 feature_names.joblib 中找到 'price_level' 模型的特征列表，无法进行价格水平预测。")
-        insufficient_data_flags['price_level'] = True
-        price_level_pred_label = "配置缺失"
-    elif check_sufficiency('price_level', price_level_features_needed):
-        try:
-            input_data_price_level = {feat: all_inputs[feat] for feat in price_level_features_needed}
-            input_df_price_level = pd.DataFrame([input_data_price_level])[price_level_features_needed] # 确保顺序
-            price_level_pred_code_raw = price_level_model.predict(input_df_price_level)[0]
-            price_level_output_map_raw = mappings.get('是否高于区域均价', {})
-
-            # 确定映射的键类型并存储代码
-            if isinstance(price_level_pred_code_raw, (int, np.integer, float)):
-                 price_level_pred_key = int(price_level_pred_code_raw)
-                 price_level_pred_code = price_level_pred_key # 存储 0 或 1
-            else:
-                 price_level_pred_key = str(price_level_pred_code_raw)
-                 price_level_pred_code = -99 # 错误/未知代码
-
-            price_level_pred_label = price_level_output_map_raw.get(price_level_pred_key, f"未知编码 ({price_level_pred_key})")
-
-        except Exception as e:
-            msg = f"价格水平模型预测时发生错误: {e}"
-            print(msg)
-            error_messages.append(msg)
-            price_level_pred_label = "预测失败"
-            price_level_pred_code = -99 # 确保错误代码
-    else:
-        # check_sufficiency 返回 False
-        price_level_pred_label = "数据不足"
-        price_level_pred_code = -99 # 如果需要，指示数据不足状态
-
-    # --- 3. 均价预测 (回归) ---
-    # ***** 使用代码中定义的 REQUIRED_REGRESSION_FEATURES *****
-    regression_features_needed = REQUIRED_REGRESSION_FEATURES
-    print(f"执行均价预测，使用特征: {regression_features_needed}") # 记录正在使用的特征
-
-    if check_sufficiency('regression', regression_features_needed):
-        try:
-            # 使用 REQUIRED_REGRESSION_FEATURES 列表准备数据
-            input_data_reg = {feat: all_inputs[feat] for feat in regression_features_needed}
-            # 创建列顺序与 REQUIRED_REGRESSION_FEATURES 完全一致的 DataFrame
-            input_df_reg = pd.DataFrame([input_data_reg])[regression_features_needed]
-            print("均价预测模型输入 DataFrame (原始):", input_df_reg)
-
-            # 应用缩放器 - 必须与训练时使用的特征和顺序匹配
-            try:
-                 input_df_reg_scaled = scaler.transform(input_df_reg)
-                 print("均价预测模型输入 DataFrame (缩放后):", input_df_reg_scaled)
-            except ValueError as ve:
-                 print(f"缩放器错误: {ve}")
-                 # 检查错误消息是否关于特征名称/数量不匹配
-                 if "feature_names mismatch" in str(ve) or "number of features" in str(ve) or "X has" in str(ve):
-                      n_scaler_feats = getattr(scaler, 'n_features_in_', '未知数量')
-                      error_detail = f"缩放器期望 {n_scaler_feats} 个特征, 但提供了 {input_df_reg.shape[1]} 个 ({regression_features_needed})。请确保 'regression_scaler.joblib' 使用相同的特征和顺序进行训练。"
-                      raise ValueError(f"缩放器与提供的特征不匹配。{error_detail}") from ve
-                 else:
-                     raise # 重新引发其他缩放器错误
-
-            unit_price_pred_raw = regression_model.predict(input_df_reg_scaled)[0]
-            unit_price_pred = max(0, float(unit_price_pred_raw)) # 确保非负浮点数
-            print(f"均价预测结果: {unit_price_pred}")
-
-        except Exception as e:
-            msg = f"均价预测模型预测时发生错误: {e}"
-            print(msg)
-            error_messages.append(msg)
-            unit_price_pred = -1.0 # 标记为错误
-    else:
-        # check_sufficiency 返回 False
-        unit_price_pred = -1.0 # 标记为数据不足/错误状态
-        # 如果 check_sufficiency 失败，确保正确设置标志
-        insufficient_data_flags['regression'] = True
-
-    # --- 结果显示区域 ---
-    st.markdown("---")
-    st.subheader("📈 预测结果分析")
-
-    # 定义颜色
-    market_color = "#1f77b4"  # 蓝色
-    price_level_base_color = "#ff7f0e" # 橙色（用于标题）
-    unit_price_color = "#2ca02c" # 绿色
-    insufficient_data_color = "#7f7f7f" # 灰色
-    error_color = "#d62728" # 红色
-    config_missing_color = "#ffbb78" # 浅橙色，用于配置问题
-
-
-    col1, col2, col3 = st.columns(3)
-
-    # 用于创建一致结果显示块的辅助函数
-    def display_result(title, title_color, result_text, result_color):
-        st.markdown(f"<h2 style='color: {title_color}; margin-bottom: 5px; text-align: center;'>{title}</h2>", unsafe_allow_html=True)
-        st.markdown(f"<p style='font-size: 26px; font-weight: bold; color: {result_color}; margin-bottom: 10px; text-align: center;'>{result_text}</p>", unsafe_allow_html=True)
-
-
-    with col1: # 市场细分
-        title = "市场细分"
-        if market_pred_label == "配置缺失":
-             display_text = "特征配置缺失"
-             display_color = config_missing_color
-        elif insufficient_data_flags['market'] or market_pred_label == "数据不足":
-            display_text = "数据不足"
-            display_color = insufficient_data_color
-        elif market_pred_label == "预测失败":
-            display_text = "预测失败"
-            display_color = error_color
-        else:
-            display_text = market_pred_label
-            display_color = market_color # 对结果使用标题颜色
-        display_result(title, market_color, display_text, display_color)
-
-
-    with col2: # 价格水平
-        title = "价格水平 (相对区域)"
-        if price_level_pred_label == "配置缺失":
-            display_text = "特征配置缺失"
-            display_color = config_missing_color
-        elif insufficient_data_flags['price_level'] or price_level_pred_label == "数据不足":
-            display_text = "数据不足"
-            display_color = insufficient_data_color
-        elif price_level_pred_label == "预测失败" or price_level_pred_code == -99:
-             # 将 -99 代码（错误或初始状态）视为与显式失败标签相同
-             display_text = "预测失败/未知" # 组合状态
-             display_color = error_color
-        elif price_level_pred_code == 1: # 高于平均水平
-            display_text = price_level_pred_label
-            display_color = "#ff7f0e" # 红色表示更高
-        elif price_level_pred_code == 0: # 不高于平均水平
-            display_text = price_level_pred_label
-            display_color = "#ff7f0e" # 绿色表示不高于
-        else: # 当前逻辑不应发生，但包含备用方案
-            display_text = "未知状态"
-            display_color = insufficient_data_color
-        display_result(title, price_level_base_color, display_text, display_color)
-
-
-    with col3: # 均价预测
-        title = "均价预测"
-        # ***** 修改：直接在结果中添加单位，移除下方小字标签 *****
-        if insufficient_data_flags['regression']:
-            display_text = "数据不足"
-            display_color = insufficient_data_color
-        elif unit_price_pred == -1.0: # 涵盖预测错误和检查失败时的初始 '不足' 状态
-            display_text = "预测失败/数据不足"
-            display_color = error_color # 对此组合状态使用错误颜色
-        else:
-            # 格式化成功预测的价格（带单位）
-            display_text = f"{unit_price_pred:,.0f} 元/㎡"
-            display_color = unit_price_color # 对结果使用标题颜色
-        display_result(title, unit_price_color, display_text, display_color)
-
-
-    # --- 显示错误或成功/警告消息 ---
-    if error_messages:
-        st.markdown("---")
-        st.error("执行过程中遇到以下运行时错误：")
-        for i, msg in enumerate(error_messages):
-            # 向用户显示更安全的消息，记录详细信息
-            st.markdown(f"{i+1}. 分析时出现问题，请检查输入或联系管理员。")
-            print(f"Detailed Error {i+1}: {msg}") # 记录实际错误以供调试
-            if "缩放器与提供的特征不匹配" in msg: # 为缩放器问题提供具体指导
-                 st.warning(f"💡 **提示 (错误 {i+1}):** 检测到均价预测所需的特征与加载的缩放器 (`{os.path.basename(SCALER_PATH)}`) 不匹配。请确保代码中定义的特征列表 (`REQUIRED_REGRESSION_FEATURES`) 与用于训练和保存缩放器的特征列表完全一致（包括顺序）。")
-
-    # 在预测后检查标志以提供准确的状态摘要
-    has_insufficient_data = any(insufficient_data_flags.values())
-    has_errors = bool(error_messages) or market_pred_label == "预测失败" or price_level_pred_label == "预测失败" or unit_price_pred == -1.0
-
-    # 根据结果显示摘要消息
-    if not has_insufficient_data and not has_errors and market_pred_label != "配置缺失" and price_level_pred_label != "配置缺失":
-        st.success("✅ 所有分析预测完成！")
-        st.markdown("---")
-        st.info("💡 **提示:** 模型预测结果是基于历史数据和输入特征的估计，仅供参考。实际交易价格受市场供需、具体房况、谈判等多种因素影响。")
-    elif has_insufficient_data or market_pred_label == "配置缺失" or price_level_pred_label == "配置缺失":
-        st.warning("⚠️ 部分预测因输入数据不足或配置缺失未能完成。请在侧边栏提供所有必需的特征信息（避免选择'无'）")
-        st.markdown("---")
-        st.info("💡 **提示:** 模型预测结果是基于历史数据和输入特征的估计，仅供参考。实际交易价格受市场供需、具体房况、谈判等多种因素影响。")
-    elif has_errors and not error_messages: # 处理预测失败但未抛出上述异常的情况
-         st.error("❌ 部分预测失败。请检查输入或联系管理员。")
-         st.markdown("---")
-         st.info("💡 **提示:** 模型预测结果是基于历史数据和输入特征的估计，仅供参考。实际交易价格受市场供需、具体房况、谈判等多种因素影响")
-    # 如果 error_messages 不为空，则上面的错误块已显示。
-
-
-# --- 页脚信息 ---
-st.sidebar.markdown("---")
-st.sidebar.caption("模型信息: LightGBM & RandomForest")
-st.sidebar.caption("数据来源: 安居客") # 如果是示例，请说明数据来源
-st.sidebar.caption("开发者: 凌欢")
\ No newline at end of file
+# -*- coding: utf-8 -*- # 指定编码为 UTF-8
+import streamlit as st
+import numpy as np
+import joblib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from types import MappingProxyType
+from typing import Any, NamedTuple
+
+# numba 为可选依赖：存在时将回归标准化编译成 JIT 核
+try:
+    from numba import njit as _njit
+except ImportError:
+    # 未安装 numba 时退回纯 NumPy 原地运算实现
+    _njit = None
+
+# onnxruntime 为可选依赖：检测到与 .joblib 同名的 .onnx 文件时改用
+# 编译后的推理会话 (单行/小批量树模型推理可快一个数量级)，
+# 模型转换见 convert_models_to_onnx.py
+try:
+    import onnxruntime as _ort
+except ImportError:
+    _ort = None
+
+# orjson 为可选依赖：加载 .json 侧车文件时用其 C 解析器，否则退回标准库
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+# --- 日志配置 ---
+# 默认只输出 WARNING 及以上；设置环境变量 APP_LOG_LEVEL=DEBUG 可开启
+# 调试输出。所有调用统一用惰性 %s 参数：级别未启用时既不做字符串
+# 格式化，也不 repr 大对象，预测热路径上不再有阻塞的 stdout 刷新
+logging.basicConfig(level=os.environ.get('APP_LOG_LEVEL', 'WARNING'))
+log = logging.getLogger(__name__)
+
+# 预测路径刻意传 ndarray 而非 DataFrame (跳过列名校验)；sklearn 会对
+# 用 DataFrame 训练的模型逐次发出特征名警告，这里一次性屏蔽掉
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+# 输入全部来自有界的 Streamlit 控件，跳过 sklearn 每次 predict 前
+# 对 NaN/inf 的全量扫描 (缺失值在进入预测前已由充足性检查拦截)
+try:
+    import sklearn
+    sklearn.set_config(assume_finite=True)
+except ImportError:
+    pass
+
+# --- 页面基础配置 ---
+st.set_page_config(
+    page_title="盐城市二手房智能分析器",
+    page_icon="🏠",
+    layout="wide",
+    initial_sidebar_state="auto"
+)
+
+# --- 常量定义：模型和资源文件路径 ---
+# 获取脚本所在目录
+try:
+    # 在作为脚本运行时有效
+    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+except NameError:
+    # 在 __file__ 未定义的 环境（如 Streamlit sharing）中的备用方案
+    CURRENT_DIR = os.getcwd()
+
+MARKET_MODEL_PATH = os.path.join(CURRENT_DIR, 'market_segment_lgbm_model.joblib')
+PRICE_LEVEL_MODEL_PATH = os.path.join(CURRENT_DIR, 'price_level_rf_model.joblib')
+REGRESSION_MODEL_PATH = os.path.join(CURRENT_DIR, 'unit_price_rf_model.joblib')
+SCALER_PATH = os.path.join(CURRENT_DIR, 'regression_scaler.joblib')
+FEATURE_NAMES_PATH = os.path.join(CURRENT_DIR, 'feature_names.joblib')
+MAPPINGS_PATH = os.path.join(CURRENT_DIR, 'mappings.joblib')
+
+# 预计算各资源的文件名与必需文件清单：rerun 路径上的错误/提示文案
+# 不再反复调用 os.path.basename 切分路径
+MARKET_MODEL_NAME = os.path.basename(MARKET_MODEL_PATH)
+PRICE_LEVEL_MODEL_NAME = os.path.basename(PRICE_LEVEL_MODEL_PATH)
+REGRESSION_MODEL_NAME = os.path.basename(REGRESSION_MODEL_PATH)
+SCALER_NAME = os.path.basename(SCALER_PATH)
+FEATURE_NAMES_NAME = os.path.basename(FEATURE_NAMES_PATH)
+MAPPINGS_NAME = os.path.basename(MAPPINGS_PATH)
+REQUIRED_ARTIFACT_NAMES = (MARKET_MODEL_NAME, PRICE_LEVEL_MODEL_NAME, REGRESSION_MODEL_NAME,
+                           SCALER_NAME, FEATURE_NAMES_NAME, MAPPINGS_NAME)
+
+# --- ***** 新增：定义均价预测模型所需的固定特征列表 ***** ---
+# ***** 注意：这里的特征列表必须与训练回归模型和Scaler时使用的特征完全一致，包括顺序 *****
+REQUIRED_REGRESSION_FEATURES = ['所属区域', '房龄', '面积(㎡)', '楼层数', '建造时间', '室', '厅', '卫']
+log.info("代码指定均价预测特征: %s", REQUIRED_REGRESSION_FEATURES) # 记录此规范
+
+# --- 加载资源函数 (使用缓存) ---
+# max_entries 给按参数缓存的资源设上限：六个资源文件之外的陈旧条目
+# (如热更新后旧路径) 会被逐出，长期运行的部署不会无界持有模型引用
+@st.cache_resource(max_entries=8)
+def _load_joblib_artifact(file_path, mmap_mode=None):
+    """加载并独立缓存单个 .joblib 资源文件。
+
+    每个资源有自己的缓存条目：某个文件更新或需要热替换 (如 scaler) 时
+    只重新反序列化那一个文件，而不是整套模型；也便于单独卸载。
+
+    mmap_mode='r' 时把文件里 joblib 序列化的 NumPy 数组按页内存映射：
+    树模型的大数组不进 RSS、按需缺页载入，且跨进程共享页缓存
+    (要求模型用 compress=0 保存；压缩文件 joblib 会自动退回普通加载)。
+    """
+    if mmap_mode is not None:
+        return joblib.load(file_path, mmap_mode=mmap_mode)
+    # Python 默认 8KB 读缓冲对几十 MB 的随机森林 pickle 意味着大量
+    # read 系统调用；改用 1MB 缓冲减少 syscall 次数并改善顺序预读
+    with open(file_path, 'rb', buffering=1 << 20) as artifact_file:
+        return joblib.load(artifact_file)
+
+
+def load_market_model():
+    return _load_joblib_artifact(MARKET_MODEL_PATH, mmap_mode='r')
+
+
+def load_price_level_model():
+    return _load_joblib_artifact(PRICE_LEVEL_MODEL_PATH, mmap_mode='r')
+
+
+def load_regression_model():
+    return _load_joblib_artifact(REGRESSION_MODEL_PATH, mmap_mode='r')
+
+
+def load_scaler():
+    return _load_joblib_artifact(SCALER_PATH)
+
+
+def _restore_int_keys(obj):
+    """递归把 JSON 往返后变成字符串的整数键还原为 int。
+
+    JSON 对象的键只能是字符串，而输出映射 (如 '市场类别') 以整数
+    编码作键；不还原会导致预测结果查不到标签。
+    """
+    if not isinstance(obj, dict):
+        return obj
+    return {
+        (int(key) if isinstance(key, str) and key.lstrip('-').isdigit() else key):
+            _restore_int_keys(value)
+        for key, value in obj.items()
+    }
+
+
+@st.cache_resource(max_entries=8)
+def _load_json_artifact(json_path):
+    """加载并缓存单个 .json 侧车文件 (纯字典负载上 JSON 解析快于 pickle)。"""
+    with open(json_path, 'rb') as json_file:
+        payload = json_file.read()
+    data = _orjson.loads(payload) if _orjson is not None else json.loads(payload)
+    return _restore_int_keys(data)
+
+
+def load_feature_names():
+    # 存在 .json 侧车时优先使用 (见 convert_dicts_to_json.py)，否则退回 joblib
+    json_path = os.path.splitext(FEATURE_NAMES_PATH)[0] + '.json'
+    if os.path.exists(json_path):
+        return _load_json_artifact(json_path)
+    return _load_joblib_artifact(FEATURE_NAMES_PATH)
+
+
+def load_mappings():
+    json_path = os.path.splitext(MAPPINGS_PATH)[0] + '.json'
+    if os.path.exists(json_path):
+        return _load_json_artifact(json_path)
+    return _load_joblib_artifact(MAPPINGS_PATH)
+
+
+class Resources(NamedTuple):
+    """加载完成的六个资源。
+
+    属性访问代替散落各处的字符串键字典索引，拼错属性名直接抛
+    AttributeError 而不是悄悄返回 None。
+    """
+    market_model: Any
+    price_level_model: Any
+    regression_model: Any
+    scaler: Any
+    feature_names: dict
+    mappings: dict
+
+
+def load_resources():
+    """加载所有必要的资源文件 (模型, scaler, 特征名, 映射关系)。"""
+    resources = {}
+    # 用一次 scandir 读目录代替六次独立的 os.path.exists stat 调用
+    # (冷启动在网络盘上尤其明显)
+    try:
+        present_files = {entry.name for entry in os.scandir(CURRENT_DIR) if entry.is_file()}
+    except OSError as e:
+        log.error("读取目录 %s 失败: %s", CURRENT_DIR, e)
+        present_files = set()
+    missing_files = [file_name for file_name in REQUIRED_ARTIFACT_NAMES
+                     if file_name not in present_files] # 仅显示文件名
+    if missing_files:
+        log.error("缺少文件 %s。请确保所有 .joblib 文件与 app.py 在同一目录。", missing_files)
+        return None, missing_files
+    try:
+        load_tasks = {
+            'market_model': load_market_model,
+            'price_level_model': load_price_level_model,
+            'regression_model': load_regression_model,
+            'scaler': load_scaler,
+            'feature_names': load_feature_names,
+            'mappings': load_mappings,
+        }
+        # joblib 反序列化 numpy 缓冲区时会释放 GIL，六个文件的磁盘 I/O
+        # 和解码可以相互重叠：冷启动耗时从各文件之和降到最慢的一个
+        with ThreadPoolExecutor(max_workers=len(load_tasks)) as executor:
+            load_futures = {key: executor.submit(task) for key, task in load_tasks.items()}
+            for key, future in load_futures.items():
+                resources[key] = future.result()
+        loaded = Resources(**resources)
+        log.info("所有资源加载成功。")
+
+        # --- 验证 feature_names.joblib 中的回归特征 ---
+        loaded_reg_features = loaded.feature_names.get('regression')
+        if loaded_reg_features:
+            log.debug("从 %s 加载的 'regression' 特征: %s", FEATURE_NAMES_NAME, loaded_reg_features)
+            # 顺序敏感的逐项比较：scaler 按位置套用均值/方差，特征
+            # 顺序不同同样是不匹配，原先的集合比较会放过这种错位
+            if list(loaded_reg_features) != REQUIRED_REGRESSION_FEATURES:
+                 log.warning("从 %s 加载的 'regression' 特征与代码中指定的 (%s) 不完全匹配。将优先使用代码中指定的列表。", FEATURE_NAMES_NAME, REQUIRED_REGRESSION_FEATURES)
+                 # ***** 关键：检查 Scaler 是否与代码指定的特征匹配 *****
+                 if hasattr(loaded.scaler, 'n_features_in_') and loaded.scaler.n_features_in_ != len(REQUIRED_REGRESSION_FEATURES):
+                      error_msg = f"严重错误: Scaler (来自 {SCALER_NAME}) 期望 {loaded.scaler.n_features_in_} 个特征, 但代码指定了 {len(REQUIRED_REGRESSION_FEATURES)} 个回归特征 ({REQUIRED_REGRESSION_FEATURES})。请确保 Scaler 与指定的特征列表一致。"
+                      log.error("%s", error_msg)
+                      # 返回 None 以模拟此不匹配导致的加载失败
+                      return None, [error_msg]
+                 else:
+                    log.debug("从 %s 加载的 'regression' 特征与代码指定一致。", FEATURE_NAMES_NAME)
+        else:
+            log.warning("在 %s 中未找到 'regression' 特征列表。将使用代码中指定的列表: %s", FEATURE_NAMES_NAME, REQUIRED_REGRESSION_FEATURES)
+             # ***** 关键：同样检查 Scaler *****
+            if hasattr(loaded.scaler, 'n_features_in_') and loaded.scaler.n_features_in_ != len(REQUIRED_REGRESSION_FEATURES):
+                error_msg = f"严重错误: Scaler (来自 {SCALER_NAME}) 期望 {loaded.scaler.n_features_in_} 个特征, 但代码指定了 {len(REQUIRED_REGRESSION_FEATURES)} 个回归特征 ({REQUIRED_REGRESSION_FEATURES})。请确保 Scaler 与指定的特征列表一致。"
+                log.error("%s", error_msg)
+                return None, [error_msg]
+
+        return loaded, None
+    except Exception as e:
+        log.error("加载资源时发生错误: %s", e)
+        return None, [f"加载错误: {e}"]
+
+resources, load_error_info = load_resources()
+
+# --- 辅助函数 ---
+def format_mapping_options_for_selectbox(name_to_code_mapping):
+    """为 Streamlit Selectbox 准备选项和格式化函数所需的数据, 增加 '无' 选项。"""
+    if not isinstance(name_to_code_mapping, dict):
+        log.error("[格式化错误] 输入非字典: %s", type(name_to_code_mapping))
+        return {} # 出错时返回空字典
+
+    code_to_display_string = {None: "无 (不适用)"} # 首先添加 '无' 选项
+
+    # 单次遍历：对每个 code 只尝试一次 int() 转换，生成 (组别, 排序键)。
+    # 可转整数的按数值排在前，不可转的按字符串排在后，避免了原先
+    # "先整体按 int 排序、捕获 ValueError 再整体按 str 重排" 的
+    # 两次完整排序和异常驱动的控制流。
+    decorated_items = []
+    for name, code in name_to_code_mapping.items():
+        try:
+            code_key = int(code) # Selectbox 选项通常需要原始类型
+            sort_key = (0, code_key)
+        except (TypeError, ValueError):
+            code_key = str(code) # 如果无法转换为整数，则保留为字符串
+            sort_key = (1, code_key)
+        decorated_items.append((sort_key, str(name), code_key))
+
+    decorated_items.sort(key=lambda item: item[0])
+    for _sort_key, name_str, code_key in decorated_items:
+        code_to_display_string[code_key] = f"{name_str}" # 只显示名称
+
+    return code_to_display_string
+
+
+# --- Streamlit 用户界面主要部分 ---
+st.title("🏠 盐城市二手房智能分析与预测")
+st.markdown("""
+欢迎使用盐城市二手房分析工具！请在左侧边栏输入房产特征，我们将为您提供三个维度的预测：
+1.  **市场细分预测**: 判断房产属于低端、中端还是高端市场
+2.  **价格水平预测**: 判断房产单价是否高于其所在区域的平均水平
+3.  **房产均价预测**: 预测房产的每平方米单价（元/㎡）
+""")
+st.markdown("---")
+
+# --- 应用启动时资源加载失败或映射缺失的处理 ---
+if not resources:
+     st.error("❌ **应用程序初始化失败！**")
+     if load_error_info:
+         st.warning(f"无法加载必要的资源文件。错误详情:")
+         for error in load_error_info:
+             st.markdown(f"*   `{error}`")
+             # 为缩放器不匹配提供具体指导
+             if "Scaler" in error and "特征" in error:
+                 st.info(f"💡 **提示:** 上述错误表明用于均价预测的特征缩放器 (`{SCALER_NAME}`) 与代码中指定的特征列表 (`{REQUIRED_REGRESSION_FEATURES}`) 不匹配。您需要：\n    1. 确认代码中的 `REQUIRED_REGRESSION_FEATURES` 列表是正确的。\n    2. 使用 **完全相同** 的特征和 **顺序** 重新训练并保存 `regression_scaler.joblib` 文件。")
+     else:
+         st.warning("无法找到一个或多个必需的资源文件。")
+     st.markdown(f"""
+        请检查以下几点：
+        *   确认以下所有 `.joblib` 文件都与 `app.py` 文件在 **同一个** 目录下:
+            *   `{MARKET_MODEL_NAME}`
+            *   `{PRICE_LEVEL_MODEL_NAME}`
+            *   `{REGRESSION_MODEL_NAME}`
+            *   `{SCALER_NAME}`
+            *   `{FEATURE_NAMES_NAME}`
+            *   `{MAPPINGS_NAME}`
+        *   确保 `{MAPPINGS_NAME}` 和 `{FEATURE_NAMES_NAME}` 文件内容有效。
+        *   检查运行 Streamlit 的终端是否有更详细的错误信息。
+     """)
+     st.stop()
+
+# --- 如果资源加载成功 ---
+mappings = resources.mappings
+feature_names_loaded = resources.feature_names
+market_model = resources.market_model
+price_level_model = resources.price_level_model
+regression_model = resources.regression_model
+scaler = resources.scaler
+
+# 检查核心映射和特征列表是否存在且为预期类型
+required_mappings = ['方位', '楼层', '所属区域', '房龄', '市场类别', '是否高于区域均价']
+required_features_in_file = ['market', 'price_level'] # 回归特征单独处理
+
+
+@st.cache_resource
+def _validate_resource_contents():
+    """校验核心映射与特征列表的存在性和类型，返回错误条目元组。
+
+    被校验的资源对象本身已被缓存、跨 rerun 不变，校验结论也随之
+    稳定，因此每个进程只扫描一次，rerun 路径上只剩一次缓存命中。
+    """
+    problems = []
+
+    # 先用集合差集一次性找出缺失的键，再只对实际存在的键做类型检查，
+    # 避免逐键的 "in + get" 双重哈希查找
+    bad_mapping_keys = set(required_mappings) - mappings.keys()
+    bad_mapping_keys.update(key for key in set(required_mappings) - bad_mapping_keys
+                            if not isinstance(mappings[key], dict))
+    if bad_mapping_keys:
+        # 按声明顺序输出错误信息，保持提示稳定可读
+        problems.extend(f"映射 '{key}' (来自 {MAPPINGS_NAME})"
+                        for key in required_mappings if key in bad_mapping_keys)
+
+    # feature_names 的值应该是一个列表
+    bad_feature_keys = set(required_features_in_file) - feature_names_loaded.keys()
+    bad_feature_keys.update(key for key in set(required_features_in_file) - bad_feature_keys
+                            if not isinstance(feature_names_loaded[key], list))
+    if bad_feature_keys:
+        problems.extend(f"特征列表 '{key}' (来自 {FEATURE_NAMES_NAME})"
+                        for key in required_features_in_file if key in bad_feature_keys)
+    # 检查回归键是否存在，即使稍后覆盖它，它也可能指示问题
+    if 'regression' not in feature_names_loaded:
+        log.info("'regression' 键未在 %s 中找到。将使用代码中定义的特征列表。", FEATURE_NAMES_NAME)
+    elif not isinstance(feature_names_loaded.get('regression'), list):
+        problems.append(f"特征列表 'regression' (来自 {FEATURE_NAMES_NAME}) 格式无效 (应为列表)")
+    return tuple(problems)
+
+
+missing_or_invalid = _validate_resource_contents()
+if missing_or_invalid:
+    st.error(f"❌ 资源文件内容不完整或格式错误。缺少或无效的项目:")
+    for item in missing_or_invalid:
+        st.markdown(f"*   {item}")
+    st.stop()
+
+# --- 会话状态一次性初始化 ---
+# 按钮处理逻辑复用上次预测的切片哈希与结果；只在会话首个 rerun 创建
+if '_last_model_hashes' not in st.session_state:
+    st.session_state['_last_model_hashes'] = {}
+    st.session_state['_last_model_results'] = {}
+
+# --- 微批量预测队列 (跨会话共享) ---
+# 单行 DataFrame 上的 model.predict 对树模型来说主要是每次调用的
+# Python/Cython 固定开销。这里把并发会话的请求合并成一个批次，
+# 每 ~20ms 对每个模型只调用一次 predict，把固定开销摊销到 N 个请求上。
+PREDICT_BATCH_MAX_SIZE = 64    # 单个批次最多合并的请求数
+PREDICT_BATCH_TIMEOUT = 0.02   # 等待凑批的最长时间 (秒)
+PREDICT_REQUEST_TIMEOUT = 30.0 # 单个请求等待批处理结果的上限 (秒)
+
+# --- 预分配的 float32 预测缓冲区与按模型的特征填充顺序 ---
+# pd.DataFrame([dict])[cols] 每次点击都要做 dtype 推断和 block 整理，
+# 对 1×N 行输入是纯开销。改为按模型预分配 (最大批量, 特征数) 的
+# float32 数组，预测时按索引填充并把数组直接交给 predict/transform。
+_MODEL_FEATURE_ORDERS = {
+    'market': tuple(feature_names_loaded.get('market', [])),
+    'price_level': tuple(feature_names_loaded.get('price_level', [])),
+    'regression': tuple(REQUIRED_REGRESSION_FEATURES),
+}
+_SCRATCH_BUFFERS = {
+    model_key: np.empty((PREDICT_BATCH_MAX_SIZE, len(features)), dtype=np.float32)
+    for model_key, features in _MODEL_FEATURE_ORDERS.items() if features
+}
+# 主特征顺序：所有模型特征的去重并集。每次点击只按这个顺序填一个
+# float32 向量；各模型的输入块用预计算的整数列置换一次性 gather 得到，
+# 热路径上不再有任何按特征名的字典查找或列重排
+_MASTER_FEATURE_ORDER = tuple(dict.fromkeys(
+    feature for features in _MODEL_FEATURE_ORDERS.values() for feature in features))
+_FEATURE_POSITIONS = {feature: i for i, feature in enumerate(_MASTER_FEATURE_ORDER)}
+_MODEL_PERMS = {
+    model_key: np.array([_FEATURE_POSITIONS[f] for f in features], dtype=np.intp)
+    for model_key, features in _MODEL_FEATURE_ORDERS.items() if features
+}
+_MASTER_SCRATCH = np.empty(
+    (PREDICT_BATCH_MAX_SIZE, len(_MASTER_FEATURE_ORDER)), dtype=np.float32)
+
+
+def _compile_master_row_builder():
+    """运行期生成按索引展开赋值的主向量填充函数 (部分求值)。
+
+    特征顺序启动后不再变化，把填充循环特化成一串直接下标赋值，
+    热路径上不再有 enumerate、循环计数和字典查找。
+    """
+    lines = ["def build_master_row(values, out):"]
+    for position in range(len(_MASTER_FEATURE_ORDER)):
+        lines.append(f"    value = values[{position}]")
+        lines.append(f"    out[{position}] = nan if value is None else value")
+    lines.append("    return out")
+    namespace = {'nan': float('nan')}
+    exec("\n".join(lines), namespace)
+    return namespace['build_master_row']
+
+
+_build_master_row = _compile_master_row_builder()
+# 缩放参数保持 float64：仿射运算在 float64 中完成后才写回 float32 行，
+# 与 sklearn 先 transform、predict 内部再降精度的数值路径一致。
+# (float32 常量的舍入会把部分样本推过邻近的树分裂阈值，改变预测结果)
+_SCALER_MEAN = np.ascontiguousarray(scaler.mean_, dtype=np.float64)
+_SCALER_SCALE = np.ascontiguousarray(scaler.scale_, dtype=np.float64)
+
+
+if _njit is not None:
+    @_njit(cache=True)
+    def _scale_rows_kernel(row_block, mean, scale):
+        for i in range(row_block.shape[0]):
+            for j in range(row_block.shape[1]):
+                # float32 元素与 float64 参数运算时在 float64 中求值，
+                # 仅存回时降为 float32
+                row_block[i, j] = (row_block[i, j] - mean[j]) / scale[j]
+
+    def _scale_regression_inplace(row_block):
+        """JIT 版本：原地标准化回归输入 (等价于 scaler.transform)。"""
+        _scale_rows_kernel(row_block, _SCALER_MEAN, _SCALER_SCALE)
+        return row_block
+
+    # 启动时用一行零数据预热，把 JIT 编译成本移出首次预测请求
+    _scale_rows_kernel(
+        np.zeros((1, len(REQUIRED_REGRESSION_FEATURES)), dtype=np.float32),
+        _SCALER_MEAN, _SCALER_SCALE,
+    )
+else:
+    def _scale_regression_inplace(row_block):
+        """对回归输入做原地标准化，等价于 scaler.transform 但跳过 sklearn 校验。"""
+        # 中间结果为 float64，赋值回 float32 行时一次性降精度
+        row_block[...] = (row_block - _SCALER_MEAN) / _SCALER_SCALE
+        return row_block
+
+
+# 预测输入只来自上面预分配的 C 连续 float32 缓冲区 (正是 sklearn 内部
+# 的目标 dtype)，形状恒定，因此跳过随机森林每次 predict 都要做的
+# check_array/check_is_fitted 与 float64→float32 拷贝。此后这两个模型
+# 的输入被视为可信，任何新调用方都必须经由本模块的缓冲区提交。
+for _rf_model in (price_level_model, regression_model):
+    if hasattr(_rf_model, '_validate_X_predict'):
+        _rf_model._validate_X_predict = lambda X, check_input=True: X
+
+
+@st.cache_resource(max_entries=8)
+def _load_onnx_session(joblib_path):
+    """若装有 onnxruntime 且存在同名 .onnx 文件，返回其推理会话，否则 None。"""
+    if _ort is None:
+        return None
+    onnx_path = os.path.splitext(joblib_path)[0] + '.onnx'
+    if not os.path.exists(onnx_path):
+        return None
+    session_options = _ort.SessionOptions()
+    session_options.intra_op_num_threads = 1  # 小批量推理时线程编排本身就是开销
+    session = _ort.InferenceSession(
+        onnx_path, sess_options=session_options, providers=['CPUExecutionProvider'])
+    log.info("已启用 ONNX 推理会话: %s", os.path.basename(onnx_path))
+    return session
+
+
+def _make_model_runner(onnx_session, fallback_predict):
+    """优先用 ONNX 会话做批量预测；没有转换产物时退回原模型的 predict。"""
+    if onnx_session is None:
+        return fallback_predict
+    input_name = onnx_session.get_inputs()[0].name
+    output_name = onnx_session.get_outputs()[0].name
+
+    def run_with_onnx(row_block):
+        return onnx_session.run([output_name], {input_name: row_block})[0].reshape(-1)
+
+    return run_with_onnx
+
+
+def _make_lgbm_booster_runner(model, fallback_predict):
+    """绕过 sklearn 包装层，直接用 LightGBM Booster 做 float32 批量预测。
+
+    sklearn 树模型的阈值数组是固定 float64 的 Cython 结构、无法原地降级，
+    但 LightGBM 原生接受 float32 输入；跳过包装层还省掉每次调用的
+    输入校验与 DataFrame 兼容处理。
+    """
+    booster = getattr(model, 'booster_', None)
+    classes = getattr(model, 'classes_', None)
+    if booster is None or classes is None:
+        return fallback_predict
+
+    def run_with_booster(row_block):
+        scores = booster.predict(row_block, predict_disable_shape_check=True)
+        if scores.ndim == 2:
+            class_indices = scores.argmax(axis=1)
+        else:
+            class_indices = (scores > 0.5).astype(np.int64)
+        return classes[class_indices]
+
+    return run_with_booster
+
+
+_market_runner = _make_model_runner(
+    _load_onnx_session(MARKET_MODEL_PATH),
+    _make_lgbm_booster_runner(market_model, market_model.predict))
+_price_level_runner = _make_model_runner(
+    _load_onnx_session(PRICE_LEVEL_MODEL_PATH), price_level_model.predict)
+_regression_core_runner = _make_model_runner(
+    _load_onnx_session(REGRESSION_MODEL_PATH), regression_model.predict)
+
+_MODEL_RUNNERS = {
+    'market': _market_runner,
+    'price_level': _price_level_runner,
+    # 回归路径先原地标准化再进入 (ONNX 或 sklearn) 预测器
+    'regression': lambda row_block: _regression_core_runner(_scale_regression_inplace(row_block)),
+}
+
+
+@st.cache_resource
+def _warm_up_predictors():
+    """启动时用全零哑输入把三条预测路径各跑一遍。
+
+    LightGBM 首次 predict、sklearn 懒分配的线程本地缓冲以及 (启用时)
+    numba JIT/ONNX 会话初始化都在此完成，首位用户的点击不再承担
+    这几十毫秒的一次性成本。每个进程只执行一次。
+    """
+    try:
+        for model_key, run_model in _MODEL_RUNNERS.items():
+            features = _MODEL_FEATURE_ORDERS[model_key]
+            if features:
+                run_model(np.zeros((1, len(features)), dtype=np.float32))
+        log.info("预测路径预热完成。")
+    except Exception as e:
+        log.warning("预测路径预热失败 (不影响功能): %s", e)
+    return True
+
+
+_warm_up_predictors()
+
+
+@st.cache_resource
+def _get_prediction_pool():
+    """三个模型共享的预测线程池，每个进程只创建一次。"""
+    return ThreadPoolExecutor(max_workers=len(_MODEL_RUNNERS),
+                              thread_name_prefix='model_predict')
+
+
+def _run_batched_predictions(batch):
+    """对一批请求执行三个模型的预测，每个模型在整个批次上只调用一次。
+
+    batch 中每项为 (master_row, wanted_models, future)：master_row 是按
+    _MASTER_FEATURE_ORDER 填好的 float32 向量，wanted_models 是本次请求
+    需要的模型键集合。结果以 {模型键: 预测值或异常} 的字典通过 future 返回。
+    """
+    results = [{} for _ in batch]
+
+    # 整个批次的主特征向量只复制一次进主缓冲区；三个模型随后并发地
+    # 从中 gather 各自需要的行和列
+    master_block = _MASTER_SCRATCH[:len(batch)]
+    for row_pos, (master_row, _wanted, _future) in enumerate(batch):
+        master_block[row_pos] = master_row
+
+    def predict_for_model(model_key, run_model, positions):
+        try:
+            # 行选择 + 预计算整数列置换，gather 进该模型自己的缓冲区
+            row_block = _SCRATCH_BUFFERS[model_key][:len(positions)]
+            np.take(master_block[positions], _MODEL_PERMS[model_key],
+                    axis=1, out=row_block)
+            predictions = run_model(row_block)
+            for pos, prediction in zip(positions, predictions):
+                results[pos][model_key] = prediction
+        except Exception as e:
+            # 该模型整批预测失败时，把异常逐个回传给各请求方处理
+            log.error("批量预测模型 '%s' 时发生错误: %s", model_key, e)
+            for pos in positions:
+                results[pos][model_key] = e
+
+    # 三个模型相互独立且预测主体在 Cython/原生代码中释放 GIL，
+    # 用线程池并发执行：总延迟从三者之和降到三者的最大值
+    prediction_pool = _get_prediction_pool()
+    pending_tasks = []
+    for model_key, run_model in _MODEL_RUNNERS.items():
+        positions = [pos for pos, (_row, wanted_models, _future) in enumerate(batch)
+                     if model_key in wanted_models]
+        if not positions:
+            continue  # 本批次没有请求需要这个模型
+        pending_tasks.append(
+            prediction_pool.submit(predict_for_model, model_key, run_model, positions))
+    for task in pending_tasks:
+        task.result() # predict_for_model 内部已各自捕获并记录异常
+
+    for (_row, _wanted, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result)
+
+
+def _predict_worker(request_queue):
+    """后台线程：阻塞等待首个请求，随后在超时窗口内继续凑批再统一预测。
+
+    收到 None 哨兵时退出循环：卸载缓存时借此结束旧线程，释放它在
+    启动那次脚本运行中捕获的模型与缓冲区引用。
+    """
+    while True:
+        first_item = request_queue.get()  # 阻塞直到有第一个请求
+        if first_item is None:
+            return
+        batch = [first_item]
+        deadline = time.monotonic() + PREDICT_BATCH_TIMEOUT
+        while len(batch) < PREDICT_BATCH_MAX_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = request_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # 凑批途中收到哨兵：先把手头批次处理完，再放回哨兵退出
+                request_queue.put(None)
+                break
+            batch.append(item)
+        try:
+            _run_batched_predictions(batch)
+        except Exception as e:
+            # 批处理本身出错时把异常逐个回传给请求方：这是进程里唯一的
+            # 批处理线程，绝不能让未捕获异常把它杀死、让后续请求永久挂起
+            log.exception("批处理线程执行批次失败: %s", e)
+            for _row, _wanted, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+@st.cache_resource
+def get_predict_request_queue():
+    """惰性创建跨会话共享的请求队列，并启动后台批处理线程。"""
+    request_queue = queue.Queue()
+    worker = threading.Thread(target=_predict_worker, args=(request_queue,), daemon=True)
+    worker.start()
+    return request_queue
+
+
+def submit_prediction_request(master_row, wanted_models):
+    """把本次请求放入共享队列，阻塞等待批处理线程返回各模型的结果。
+
+    等待设有上限：若批处理线程意外不可用，请求方收到每个模型一份
+    超时异常 (由结果区按 '预测失败' 展示)，而不是无限期挂起会话。
+    """
+    future = Future()
+    get_predict_request_queue().put((master_row, wanted_models, future))
+    try:
+        return future.result(timeout=PREDICT_REQUEST_TIMEOUT)
+    except FutureTimeoutError:
+        log.error("预测请求等待超过 %.0f 秒未返回，批处理线程可能已不可用。",
+                  PREDICT_REQUEST_TIMEOUT)
+        timeout_error = RuntimeError(
+            f"预测请求在 {PREDICT_REQUEST_TIMEOUT:.0f} 秒内未返回结果")
+        return {model_key: timeout_error for model_key in wanted_models}
+
+
+class _PredictionFailure(Exception):
+    """内部信号：本组结果含预测失败，不应写入跨会话缓存。"""
+
+    def __init__(self, results):
+        super().__init__("预测结果包含异常")
+        self.results = results
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _predict_cached(master_values, wanted_key):
+    """以输入值元组为键缓存整组预测结果。
+
+    用户常在侧边栏反复微调后用相同输入再次点击预测；相同的
+    (输入, 模型集合) 组合直接从 LRU 缓存返回，不再走模型。
+    键里用 None 表示缺失值 (NaN 自身不等于自身，会让缓存永远失效)。
+    """
+    master_row = _build_master_row(
+        master_values, np.empty(len(_MASTER_FEATURE_ORDER), dtype=np.float32))
+    results = submit_prediction_request(master_row, set(wanted_key))
+    if any(isinstance(result, Exception) for result in results.values()):
+        # cache_data 不缓存抛出的异常：借此把失败结果带出缓存层，
+        # 避免一次瞬时故障被固化成对相同输入的永久 '预测失败'
+        raise _PredictionFailure(results)
+    return results
+
+
+def _predict_with_cache(master_values, wanted_key):
+    """预测缓存的外层入口：成功结果走 LRU，失败结果原样返回但不缓存。"""
+    try:
+        return _predict_cached(master_values, wanted_key)
+    except _PredictionFailure as failure:
+        return failure.results
+
+# --- 侧边栏输入控件 ---
+st.sidebar.header("🏘️ 房产特征输入")
+
+# --- ***** 修改：字典，将内部特征名映射到用户界面标签 ***** ---
+feature_to_label = MappingProxyType({
+    # 选择项
+    '方位': "房屋方位:",
+    '楼层': "楼层位置:",
+    '所属区域': "所属区域:",
+    '房龄': "房龄:",
+    # 数值项
+    '总价(万)': "总价 (万):",
+    '面积(㎡)': "面积 (㎡):",
+    '建造时间': "建造时间 (年份):",
+    '楼层数': "总楼层数:",
+    '室': "室:",
+    '厅': "厅:",
+    '卫': "卫:"
+})
+
+# 各特征对应的控件键后缀 (去掉括号/单位字符)；预先建表代替散落各处的
+# 三连 .replace 字符串改写
+KEY_SUFFIX = MappingProxyType({
+    key: key.replace('(', '').replace(')', '').replace('㎡', '')
+    for key in feature_to_label
+})
+
+
+@st.cache_resource(max_entries=16)
+def _get_label_table(mapping_key):
+    """把输出映射预构建为按编码直接索引的元组查找表。
+
+    仅当映射的键是稠密的非负整数编码时可用；否则返回 None，
+    调用方退回原字典查找。每个映射只构建一次。
+    """
+    mapping = mappings.get(mapping_key)
+    if not isinstance(mapping, dict) or not mapping:
+        return None
+    if not all(isinstance(code, int) and code >= 0 for code in mapping):
+        return None
+    table_size = max(mapping) + 1
+    if table_size > len(mapping) * 4:
+        return None # 编码过于稀疏，查找表不划算
+    return tuple(mapping.get(code, f"未知编码 ({code})") for code in range(table_size))
+
+
+def _code_to_label(mapping_key, pred_code):
+    """把模型输出编码翻译为显示标签，返回 (规范化编码, 标签)。
+
+    数值编码优先走 O(1) 的元组索引，免去逐次的 isinstance 阶梯
+    和字典哈希查找；非数值或越界编码退回字典路径。
+    """
+    if isinstance(pred_code, (int, np.integer, float)):
+        pred_key = int(pred_code)
+        label_table = _get_label_table(mapping_key)
+        if label_table is not None and 0 <= pred_key < len(label_table):
+            return pred_key, label_table[pred_key]
+    else:
+        pred_key = str(pred_code)
+    return pred_key, mappings.get(mapping_key, {}).get(pred_key, f"未知编码 ({pred_key})")
+
+selectbox_inputs = {}
+selectbox_labels_map = {} # 用于在需要时将内部键映射回显示标签
+all_select_valid = True # 跟踪所有下拉框是否正确加载选项
+
+
+# 各下拉框的首选默认代码 (示例：默认为中间楼层、6-10 年房龄)
+COMMON_DEFAULT_CODES = MappingProxyType({'楼层': 1, '房龄': 2})
+
+
+@st.cache_resource(max_entries=16)
+def get_display_map(mapping_key):
+    """按映射键缓存 (选项元组, 只读显示映射, 格式化函数, 默认索引)。
+
+    映射内容在应用生命周期内不变，但每次控件交互都会重跑整个脚本，
+    没有缓存时四个下拉框会在每次 rerun 都重新排序、重建显示字符串，
+    还会给 Streamlit 传一个每次新建的 format_func 闭包去重新哈希。
+    返回只读的 MappingProxyType，避免调用方意外修改缓存内容。
+    """
+    display_map = format_mapping_options_for_selectbox(mappings[mapping_key])
+
+    def format_option(code, _display_map=display_map):
+        return _display_map.get(code, f"未知 ({code})")
+
+    # 默认索引只依赖选项内容，也在这里一次性算好 —
+    # 尽量避免把 '无' 作为默认值
+    options_codes = tuple(display_map.keys())
+    default_index = 0 # 如果没有其他选项或逻辑适用，则默认为 '无'
+    if len(options_codes) > 1:
+        target_default_code = COMMON_DEFAULT_CODES.get(mapping_key)
+        if target_default_code is not None and target_default_code in options_codes:
+            default_index = options_codes.index(target_default_code)
+        elif len(options_codes) > 3: # 选项较多时，选择中间附近的
+            default_index = (len(options_codes) - 1) // 2 + 1 # '无' 之后的索引
+        else: # 除了 '无' 之外只有少量选项
+            default_index = 1 # 选择第一个实际选项
+
+    return options_codes, MappingProxyType(display_map), format_option, default_index
+
+st.sidebar.subheader("选择项特征")
+# 封装下拉框创建逻辑
+def create_selectbox(internal_key, help_text, key_suffix):
+    """创建单个下拉框，返回 (选中值, 是否加载成功)。
+
+    不再通过 global 修改模块级标志，调用方自行累积成功状态。
+    """
+    label = feature_to_label.get(internal_key, internal_key) # 从映射中获取标签
+    try:
+        # 取缓存的 (选项元组, 只读显示映射, 格式化函数, 默认索引)，
+        # rerun 时既不重建选项也不重算默认位置
+        options_codes, display_map, format_option, default_index = get_display_map(internal_key)
+
+        if not display_map or len(display_map) <= 1: # 应包含 '无' 和至少一个其他选项
+             st.sidebar.warning(f"'{label}' 缺少有效选项 (除了'无')。请检查 {MAPPINGS_NAME} 中的 '{internal_key}'。")
+             if not display_map:
+                 display_map = {None: "无 (加载失败)"} # 提供备用方案
+                 options_codes = (None,)
+                 format_option = display_map.get
+                 default_index = 0
+
+        selected_value = st.sidebar.selectbox(
+            label,
+            options=options_codes,
+            index=default_index,
+            format_func=format_option,
+            key=f"{key_suffix}_select",
+            help=help_text
+        )
+        selectbox_labels_map[internal_key] = label # 存储键到标签的映射
+        return selected_value, True
+    except Exception as e:
+        st.sidebar.error(f"加载 '{label}' 选项时出错: {e}")
+        log.error("加载 %s 出错的详细信息: %s", label, e) # 记录详细错误
+        return None, False
+
+# 使用函数创建下拉选择框，并在调用侧累积加载成功标志
+for _select_key, _select_help, _select_suffix in (
+    ('方位', "选择房屋的主要朝向。选择 '无' 如果不确定或不适用。", "orientation"),
+    ('楼层', "选择房屋所在楼层的大致位置。选择 '无' 如果不确定或不适用。", "floor_level"),
+    ('所属区域', "选择房产所在的行政区域或板块。选择 '无' 如果不确定或不适用。", "district"),
+    ('房龄', "选择房屋的建造年限范围。选择 '无' 如果不确定或不适用。", "age"),
+):
+    selectbox_inputs[_select_key], _select_ok = create_selectbox(
+        _select_key, _select_help, _select_suffix)
+    all_select_valid = all_select_valid and _select_ok
+
+# --- ***** 修改：数值输入控件，增加 "无" 选项 ***** ---
+st.sidebar.subheader("数值项特征")
+numeric_inputs = {}
+numeric_input_states = {} # 用于存储状态 ('输入数值' 或 '无')
+
+# 数值控件的默认值与参数是纯常量；放进缓存函数构建一次，rerun 时
+# 不再重新分配这两组字典字面量 (脚本体每次交互都会重新执行)
+@st.cache_resource
+def _get_numeric_widget_config():
+    """返回 (数值输入参数, 默认数值) 的只读映射，每进程构建一次。"""
+    # 默认数值（仅在选择 '输入数值' 时使用）
+    default_values = {
+        '总价(万)': 120.0,
+        '面积(㎡)': 100.0,
+        '建造时间': 2018,
+        '楼层数': 30,
+        '室': 3,
+        '厅': 2,
+        '卫': 2
+    }
+
+    # 数值输入参数
+    params = {
+        '总价(万)': {'min_value': 0.0, 'max_value': 10000.0, 'step': 5.0, 'format': "%.1f", 'help': "输入房产的总价，单位万元。留空或选择 '无' 表示不适用。"},
+        '面积(㎡)': {'min_value': 1.0, 'max_value': 2000.0, 'step': 1.0, 'format': "%.1f", 'help': "输入房产的建筑面积，单位平方米。留空或选择 '无' 表示不适用。"},
+        '建造时间': {'min_value': 1900, 'max_value': 2025, 'step': 1, 'format': "%d", 'help': "输入房屋的建造年份。留空或选择 '无' 表示不适用。"},
+        '楼层数': {'min_value': 1, 'max_value': 100, 'step': 1, 'format': "%d", 'help': "输入楼栋的总楼层数。留空或选择 '无' 表示不适用。"},
+        '室': {'min_value': 0, 'max_value': 20, 'step': 1, 'format': "%d", 'help': "输入卧室数量。留空或选择 '无' 表示不适用。"},
+        '厅': {'min_value': 0, 'max_value': 10, 'step': 1, 'format': "%d", 'help': "输入客厅/餐厅数量。留空或选择 '无' 表示不适用。"},
+        '卫': {'min_value': 0, 'max_value': 10, 'step': 1, 'format': "%d", 'help': "输入卫生间数量。留空或选择 '无' 表示不适用。"}
+    }
+    return MappingProxyType(params), MappingProxyType(default_values)
+
+
+numeric_params, default_numeric_values = _get_numeric_widget_config()
+
+# 为数值特征创建组合输入小部件
+for key, label in feature_to_label.items():
+    if key in numeric_params: # 检查是否是我们处理的数值特征
+        param = numeric_params[key]
+        default_val = default_numeric_values[key]
+        key_suffix = KEY_SUFFIX[key] # 预计算的简单键后缀
+
+        # 用于选择输入值或指定 '无' 的选择器
+        numeric_input_states[key] = st.sidebar.selectbox(
+            label, # 使用 feature_to_label 中定义的标签
+            options=["输入数值", "无"],
+            index=0,  # 默认为 "输入数值"
+            key=f"{key_suffix}_selector",
+            help=param['help']
+        )
+
+        # 条件性地显示数字输入框
+        if numeric_input_states[key] == "输入数值":
+            numeric_inputs[key] = st.sidebar.number_input(
+                f"输入 {label}", # 稍微修改标签以更清晰
+                min_value=param['min_value'],
+                max_value=param['max_value'],
+                value=default_val,
+                step=param['step'],
+                format=param['format'],
+                key=f"{key_suffix}_value",
+                label_visibility="collapsed" # 隐藏标签，因为它已由选择器隐含
+            )
+        else:
+            # 如果选择了 "无 (不适用)"，则为此特征存储 None
+            numeric_inputs[key] = None
+            # 可选地，显示禁用的占位符或不显示任何内容
+            # st.sidebar.text_input(f"{label}", value="不适用", disabled=True, key=f"{key_suffix}_value_disabled")
+
+
+# --- 结果展示：颜色常量与状态→(文本, 颜色) 查找表 (构建一次) ---
+MARKET_COLOR = "#1f77b4"  # 蓝色
+PRICE_LEVEL_BASE_COLOR = "#ff7f0e" # 橙色（用于标题）
+UNIT_PRICE_COLOR = "#2ca02c" # 绿色
+INSUFFICIENT_DATA_COLOR = "#7f7f7f" # 灰色
+ERROR_COLOR = "#d62728" # 红色
+CONFIG_MISSING_COLOR = "#ffbb78" # 浅橙色，用于配置问题
+
+# 各异常状态对应的展示文本与颜色；正常预测结果走 .get 的默认分支
+STATE_TEMPLATES = {
+    'cfg_missing': ("特征配置缺失", CONFIG_MISSING_COLOR),
+    'insufficient': ("数据不足", INSUFFICIENT_DATA_COLOR),
+    'fail': ("预测失败", ERROR_COLOR),
+    'fail_or_unknown': ("预测失败/未知", ERROR_COLOR),
+    'fail_or_insufficient': ("预测失败/数据不足", ERROR_COLOR),
+    'unknown': ("未知状态", INSUFFICIENT_DATA_COLOR),
+}
+
+# 摘要区共用的免责声明 (三个分支原先各自内联同一段长文本)
+SUMMARY_DISCLAIMER = ("💡 **提示:** 模型预测结果是基于历史数据和输入特征的估计，仅供参考。"
+                      "实际交易价格受市场供需、具体房况、谈判等多种因素影响。")
+
+
+# 用于创建一致结果显示块 HTML 片段的辅助函数；三个片段最终拼成
+# 一个 flex 容器、单次 st.markdown 渲染 (每次 st.markdown 都要与前端
+# 做一轮 protobuf 往返，从 6 次降为 1 次)
+def build_result_block(title, title_color, result_text, result_color):
+    return (
+        f"<div style='flex: 1; text-align: center;'>"
+        f"<h2 style='color: {title_color}; margin-bottom: 5px;'>{title}</h2>"
+        f"<p style='font-size: 26px; font-weight: bold; color: {result_color}; margin-bottom: 10px;'>{result_text}</p>"
+        f"</div>"
+    )
+
+
+# --- 预测触发按钮 ---
+st.sidebar.markdown("---")
+predict_button_disabled = not all_select_valid # 即使某些数值为 None 仍可预测
+predict_button_help = "点击这里根据输入的特征进行预测分析" if all_select_valid else "部分下拉框选项加载失败，无法进行预测。请检查资源文件或错误信息。"
+
+if st.sidebar.button("🚀 开始分析预测", type="primary", use_container_width=True, help=predict_button_help, disabled=predict_button_disabled):
+
+    # --- ***** 修改：整合输入时处理 None 值 (SoA 布局) ***** ---
+    # 所有输入按主特征顺序写进一个 float32 向量，'无' 用 NaN 哨兵表示；
+    # 下游一律按预计算的整数下标访问，不再维护字符串键的 all_inputs 字典
+    master_row = np.full(len(_MASTER_FEATURE_ORDER), np.nan, dtype=np.float32)
+    for feature, value in selectbox_inputs.items():
+        position = _FEATURE_POSITIONS.get(feature)
+        if position is None or value is None:
+            continue
+        try:
+            master_row[position] = value
+        except (TypeError, ValueError):
+            # 映射表里的编码不是数值 (例如字符串类别码) 时无法写入特征
+            # 向量：保持 NaN 让对应模型按 '数据不足' 降级，而不是崩溃
+            log.error("特征 '%s' 的编码 %r 不是数值，已按缺失处理。", feature, value)
+    for feature, state in numeric_input_states.items():
+        position = _FEATURE_POSITIONS.get(feature)
+        if position is None or state == "无":
+            continue # 模型用不到的数值项，或用户选择了 '无'
+        # 从相应的 number_input 小部件检索值
+        master_row[position] = st.session_state[f"{KEY_SUFFIX[feature]}_value"]
+
+    log.debug("Combined inputs for prediction: %s", master_row) # 调试输出
+
+    # --- 初始化结果变量 ---
+    market_pred_label = "等待计算..."
+    price_level_pred_label = "等待计算..."
+    price_level_pred_code = -99 # 对 '未预测' 或 '错误' 使用不同的代码
+    unit_price_pred = -1.0 # 对 '未预测' 或 '错误' 使用 -1.0
+    error_messages = []
+    insufficient_data_flags = {'market': False, 'price_level': False, 'regression': False}
+    config_missing_models = set() # 所需特征没有对应输入控件的模型
+
+    # 界面上实际存在输入控件的特征集合；模型需要但不在其中的特征
+    # 永远无法被用户填充，属于配置错误而非普通的 '数据不足'
+    ui_features = selectbox_inputs.keys() | numeric_input_states.keys()
+
+    # --- ***** 修改：Helper Function to Check Input Sufficiency (Handles NaN) ***** ---
+    def check_sufficiency(model_key, required_feature_list):
+        """检查模型所需的所有特征在主向量中是否均已填充 (非 NaN)。"""
+        # 快路径：用预计算的列置换对主向量做一次向量化 NaN 测试
+        perm = _MODEL_PERMS.get(model_key)
+        if perm is not None and not np.isnan(master_row[perm]).any():
+            return True # 数据充足
+        # 慢路径仅在数据不足或配置异常时进入，逐特征定位缺失项以便记录
+        missing_for_model = []
+        for feat in required_feature_list:
+            position = _FEATURE_POSITIONS.get(feat)
+            if position is None or feat not in ui_features:
+                 # 这是一个关键配置错误 - 所需特征没有对应的输入控件！
+                 log.error("模型 '%s' 需要的特征 '%s' 在UI输入中未定义!", model_key, feat)
+                 missing_for_model.append(f"{feature_to_label.get(feat, feat)} (UI未定义)")
+                 config_missing_models.add(model_key)
+            elif np.isnan(master_row[position]):
+                # 特征存在，但仍是 NaN 哨兵（用户选择了 '无' 或加载失败）
+                missing_for_model.append(feature_to_label.get(feat, feat)) # 使用显示标签
+
+        if missing_for_model:
+            log.debug("模型 '%s' 数据不足，缺少: %s", model_key, missing_for_model)
+            insufficient_data_flags[model_key] = True
+            return False # 数据不足
+        return True # 数据充足
+
+
+    # --- 确定需要运行的模型，组装主特征向量后一次性提交 ---
+    wanted_models = set()
+
+    # 1. 市场细分：检查配置与数据充足性
+    market_features_needed = _MODEL_FEATURE_ORDERS['market'] # 预派生的只读元组
+    if not market_features_needed:
+         st.warning("警告: 未在 feature_names.joblib 中找到 'market' 模型的特征列表，无法进行市场细分预测。")
+         insufficient_data_flags['market'] = True # 标记为不足
+         market_pred_label = "配置缺失" # 特定状态
+    elif check_sufficiency('market', market_features_needed):
+        wanted_models.add('market')
+    else:
+        # check_sufficiency 返回 False：区分普通缺值与控件缺失的配置错误
+        market_pred_label = "配置缺失" if 'market' in config_missing_models else "数据不足"
+
+    # 2. 价格水平：检查配置与数据充足性
+    price_level_features_needed = _MODEL_FEATURE_ORDERS['price_level']
+    if not price_level_features_needed:
+        st.warning("警告: 未在 feature_names.joblib 中找到 'price_level' 模型的特征列表，无法进行价格水平预测。")
+        insufficient_data_flags['price_level'] = True
+        price_level_pred_label = "配置缺失"
+    elif check_sufficiency('price_level', price_level_features_needed):
+        wanted_models.add('price_level')
+    else:
+        # check_sufficiency 返回 False：区分普通缺值与控件缺失的配置错误
+        price_level_pred_label = "配置缺失" if 'price_level' in config_missing_models else "数据不足"
+        price_level_pred_code = -99 # 如果需要，指示数据不足状态
+
+    # 3. 均价预测 (回归)
+    # ***** 使用代码中定义的 REQUIRED_REGRESSION_FEATURES *****
+    regression_features_needed = REQUIRED_REGRESSION_FEATURES
+    log.debug("执行均价预测，使用特征: %s", regression_features_needed) # 记录正在使用的特征
+
+    if check_sufficiency('regression', regression_features_needed):
+        wanted_models.add('regression')
+    else:
+        # check_sufficiency 返回 False
+        unit_price_pred = -1.0 # 标记为数据不足/错误状态
+        # 如果 check_sufficiency 失败，确保正确设置标志
+        insufficient_data_flags['regression'] = True
+        if 'regression' in config_missing_models:
+            # 回归列没有单独的 '配置缺失' 状态，用错误消息显式上报
+            error_messages.append("配置错误: 均价预测所需的部分特征没有对应的输入控件，请检查特征配置。")
+
+    # 会话级细粒度复用：对每个模型的特征切片取哈希，切片与上次点击
+    # 相同的模型直接复用上次的原始预测，不再进入预测路径。
+    # (例如只改了 总价/面积 时，不使用这些特征的模型无需重跑)
+    last_hashes = st.session_state['_last_model_hashes']
+    last_results = st.session_state['_last_model_results']
+    model_hashes = {}
+    reused_results = {}
+    models_to_run = set(wanted_models)
+    for model_key in wanted_models:
+        slice_hash = hash(master_row[_MODEL_PERMS[model_key]].tobytes())
+        model_hashes[model_key] = slice_hash
+        if last_hashes.get(model_key) == slice_hash and model_key in last_results:
+            reused_results[model_key] = last_results[model_key]
+            models_to_run.discard(model_key)
+
+    # 按主特征顺序取值组成缓存键；命中 LRU 缓存时直接返回上次结果，
+    # 否则提交到跨会话共享的批处理队列，后台线程把并发请求合并成
+    # 每个模型单次 predict 调用，再把结果回传到这里
+    if models_to_run:
+        master_values = tuple(
+            None if np.isnan(value) else float(value) for value in master_row)
+        batch_results = _predict_with_cache(master_values, tuple(sorted(models_to_run)))
+    else:
+        batch_results = {}
+    if reused_results:
+        log.debug("特征切片未变化、复用上次结果的模型: %s", sorted(reused_results))
+        batch_results = {**batch_results, **reused_results}
+
+    # 记录本次成功的原始预测供下次点击复用 (异常结果不缓存)
+    for model_key, slice_hash in model_hashes.items():
+        model_result = batch_results.get(model_key)
+        if model_result is not None and not isinstance(model_result, Exception):
+            last_hashes[model_key] = slice_hash
+            last_results[model_key] = model_result
+
+    # --- 1. 市场细分预测结果解析 ---
+    if 'market' in wanted_models:
+        market_result = batch_results.get('market')
+        if isinstance(market_result, Exception):
+            msg = f"市场细分模型预测时发生错误: {market_result}"
+            log.error("%s", msg)
+            error_messages.append(msg)
+            market_pred_label = "预测失败" # 指示运行时错误
+        else:
+            try:
+                # 数值编码直接索引预构建的标签表
+                _market_pred_key, market_pred_label = _code_to_label('市场类别', market_result)
+            except Exception as e:
+                msg = f"市场细分模型预测时发生错误: {e}"
+                log.error("%s", msg)
+                error_messages.append(msg)
+                market_pred_label = "预测失败"
+
+    # --- 2. 价格水平预测结果解析 ---
+    if 'price_level' in wanted_models:
+        price_level_result = batch_results.get('price_level')
+        if isinstance(price_level_result, Exception):
+            msg = f"价格水平模型预测时发生错误: {price_level_result}"
+            log.error("%s", msg)
+            error_messages.append(msg)
+            price_level_pred_label = "预测失败"
+            price_level_pred_code = -99 # 确保错误代码
+        else:
+            try:
+                price_level_pred_key, price_level_pred_label = _code_to_label(
+                    '是否高于区域均价', price_level_result)
+                # 数值编码存储 0 或 1；非数值编码记为错误/未知代码
+                price_level_pred_code = price_level_pred_key if isinstance(price_level_pred_key, int) else -99
+            except Exception as e:
+                msg = f"价格水平模型预测时发生错误: {e}"
+                log.error("%s", msg)
+                error_messages.append(msg)
+                price_level_pred_label = "预测失败"
+                price_level_pred_code = -99 # 确保错误代码
+
+    # --- 3. 均价预测结果解析 ---
+    if 'regression' in wanted_models:
+        regression_result = batch_results.get('regression')
+        if isinstance(regression_result, Exception):
+            e = regression_result
+            # 检查错误消息是否关于特征名称/数量不匹配 (来自缩放器)
+            if isinstance(e, ValueError) and ("feature_names mismatch" in str(e) or "number of features" in str(e) or "X has" in str(e)):
+                n_scaler_feats = getattr(scaler, 'n_features_in_', '未知数量')
+                error_detail = f"缩放器期望 {n_scaler_feats} 个特征, 但提供了 {len(regression_features_needed)} 个 ({regression_features_needed})。请确保 'regression_scaler.joblib' 使用相同的特征和顺序进行训练。"
+                msg = f"均价预测模型预测时发生错误: 缩放器与提供的特征不匹配。{error_detail}"
+            else:
+                msg = f"均价预测模型预测时发生错误: {e}"
+            log.error("%s", msg)
+            error_messages.append(msg)
+            unit_price_pred = -1.0 # 标记为错误
+        else:
+            unit_price_pred = max(0, float(regression_result)) # 确保非负浮点数
+            log.debug("均价预测结果: %s", unit_price_pred)
+
+    # --- 结果显示区域 ---
+    st.markdown("---")
+    st.subheader("📈 预测结果分析")
+
+    result_blocks = []
+
+    # 市场细分
+    # 归一化为状态键后查表；正常结果走默认分支 (结果文本 + 标题颜色)
+    if market_pred_label == "配置缺失":
+        state_key = 'cfg_missing'
+    elif insufficient_data_flags['market'] or market_pred_label == "数据不足":
+        state_key = 'insufficient'
+    elif market_pred_label == "预测失败":
+        state_key = 'fail'
+    else:
+        state_key = None
+    display_text, display_color = STATE_TEMPLATES.get(state_key, (market_pred_label, MARKET_COLOR))
+    result_blocks.append(build_result_block("市场细分", MARKET_COLOR, display_text, display_color))
+
+    # 价格水平
+    if price_level_pred_label == "配置缺失":
+        state_key = 'cfg_missing'
+    elif insufficient_data_flags['price_level'] or price_level_pred_label == "数据不足":
+        state_key = 'insufficient'
+    elif price_level_pred_label == "预测失败" or price_level_pred_code == -99:
+        # 将 -99 代码（错误或初始状态）视为与显式失败标签相同
+        state_key = 'fail_or_unknown'
+    elif price_level_pred_code in (0, 1): # 正常预测 (高于/不高于区域均价)
+        state_key = None
+    else: # 当前逻辑不应发生，但包含备用方案
+        state_key = 'unknown'
+    display_text, display_color = STATE_TEMPLATES.get(state_key, (price_level_pred_label, PRICE_LEVEL_BASE_COLOR))
+    result_blocks.append(build_result_block("价格水平 (相对区域)", PRICE_LEVEL_BASE_COLOR, display_text, display_color))
+
+    # 均价预测
+    # ***** 修改：直接在结果中添加单位，移除下方小字标签 *****
+    if insufficient_data_flags['regression']:
+        state_key = 'insufficient'
+    elif unit_price_pred == -1.0: # 涵盖预测错误和检查失败时的初始 '不足' 状态
+        state_key = 'fail_or_insufficient'
+    else:
+        state_key = None
+    # 格式化成功预测的价格（带单位）
+    display_text, display_color = STATE_TEMPLATES.get(
+        state_key, (f"{unit_price_pred:,.0f} 元/㎡", UNIT_PRICE_COLOR))
+    result_blocks.append(build_result_block("均价预测", UNIT_PRICE_COLOR, display_text, display_color))
+
+    # 三列合并成一个 flex 容器，整块只经过一次 st.markdown
+    st.markdown(
+        "<div style='display: flex; gap: 2em;'>" + "".join(result_blocks) + "</div>",
+        unsafe_allow_html=True)
+
+
+    # --- 显示错误或成功/警告消息 ---
+    if error_messages:
+        st.markdown("---")
+        st.error("执行过程中遇到以下运行时错误：")
+        for i, msg in enumerate(error_messages):
+            # 向用户显示更安全的消息，记录详细信息
+            st.markdown(f"{i+1}. 分析时出现问题，请检查输入或联系管理员。")
+            log.error("Detailed Error %d: %s", i + 1, msg) # 记录实际错误以供调试
+            if "缩放器与提供的特征不匹配" in msg: # 为缩放器问题提供具体指导
+                 st.warning(f"💡 **提示 (错误 {i+1}):** 检测到均价预测所需的特征与加载的缩放器 (`{SCALER_NAME}`) 不匹配。请确保代码中定义的特征列表 (`REQUIRED_REGRESSION_FEATURES`) 与用于训练和保存缩放器的特征列表完全一致（包括顺序）。")
+
+    # 在预测后检查标志以提供准确的状态摘要。短路布尔链代替
+    # any(dict.values())，全部正常的快路径在第一个 False 处即返回；
+    # 配置缺失的标签比较也只做一次、两处分支复用
+    has_insufficient_data = (insufficient_data_flags['market']
+                             or insufficient_data_flags['price_level']
+                             or insufficient_data_flags['regression'])
+    has_config_missing = market_pred_label == "配置缺失" or price_level_pred_label == "配置缺失"
+    has_errors = (bool(error_messages) or market_pred_label == "预测失败"
+                  or price_level_pred_label == "预测失败" or unit_price_pred == -1.0)
+
+    # 根据结果显示摘要消息；免责声明在各分支后统一补发一次
+    show_disclaimer = True
+    if not has_insufficient_data and not has_errors and not has_config_missing:
+        st.success("✅ 所有分析预测完成！")
+    elif has_insufficient_data or has_config_missing:
+        st.warning("⚠️ 部分预测因输入数据不足或配置缺失未能完成。请在侧边栏提供所有必需的特征信息（避免选择'无'）")
+    elif has_errors and not error_messages: # 处理预测失败但未抛出上述异常的情况
+        st.error("❌ 部分预测失败。请检查输入或联系管理员。")
+    else:
+        # error_messages 不为空时，上面的错误块已显示详细信息
+        show_disclaimer = False
+    if show_disclaimer:
+        st.markdown("---")
+        st.info(SUMMARY_DISCLAIMER)
+
+
+# --- 页脚信息 ---
+# 三条 caption 合并为一次调用：每个 Streamlit 元素都是一条独立的
+# 前端 delta，页脚静态文本没必要占三条
+FOOTER_CAPTION = ("模型信息: LightGBM & RandomForest  \n"
+                  "数据来源: 安居客  \n" # 如果是示例，请说明数据来源
+                  "开发者: 凌欢")
+
+st.sidebar.markdown("---")
+# 卸载所有已缓存的模型/资源，下次运行时重新加载。
+# Streamlit 每次运行都会重新执行整个脚本：批处理线程和各级缓存持有的
+# 是它们创建那一次运行的对象引用，因此必须先让旧线程退出、再把
+# cache_resource/cache_data 连同会话级结果一起清空，否则旧模型会
+# 继续常驻内存，预测也仍会路由到旧对象上。
+if st.sidebar.button("♻️ 卸载模型缓存", help="清空已缓存的模型与资源文件，下次预测时重新加载。"):
+    get_predict_request_queue().put(None)  # 通知旧批处理线程退出
+    st.cache_resource.clear()  # 模型、ONNX 会话、映射表、线程池、请求队列
+    st.cache_data.clear()      # 跨会话的预测结果缓存一并失效
+    st.session_state['_last_model_hashes'] = {}
+    st.session_state['_last_model_results'] = {}
+    st.rerun()
+st.sidebar.caption(FOOTER_CAPTION)
\ No newline at end of file
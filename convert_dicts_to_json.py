@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*- # 指定编码为 UTF-8
+"""离线转换脚本：把两个纯字典资源导出为 .json 侧车文件。
+
+用法: python convert_dicts_to_json.py
+
+feature_names.joblib 和 mappings.joblib 只是嵌套的字符串/整数字典，
+用 pickle 存取要走逐对象的指令流；JSON 解析 (尤其装有 orjson 时)
+在这种负载上快得多。app1.py 检测到同名 .json 文件时自动优先加载，
+原 .joblib 保留作为来源与回退，两条路径加载结果一致
+(JSON 键会被还原为整数编码)。模型更新后重跑一次即可。
+"""
+import json
+import os
+
+import joblib
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DICT_ARTIFACTS = (
+    'feature_names.joblib',
+    'mappings.joblib',
+)
+
+
+def convert_artifact(joblib_name):
+    """把单个字典资源导出为同名 .json 文件。"""
+    joblib_path = os.path.join(CURRENT_DIR, joblib_name)
+    if not os.path.exists(joblib_path):
+        print(f"跳过 (不存在): {joblib_name}")
+        return
+    obj = joblib.load(joblib_path)
+    json_path = os.path.splitext(joblib_path)[0] + '.json'
+    with open(json_path, 'w', encoding='utf-8') as json_file:
+        json.dump(obj, json_file, ensure_ascii=False, indent=2)
+    print(f"已导出: {json_path}")
+
+
+if __name__ == '__main__':
+    for artifact_name in DICT_ARTIFACTS:
+        convert_artifact(artifact_name)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*- # 指定编码为 UTF-8
+"""离线转换脚本：把三个树模型导出为 ONNX，供 app1.py 的 onnxruntime 快速路径使用。
+
+用法: python convert_models_to_onnx.py
+
+依赖 skl2onnx (随机森林) 与 onnxmltools (LightGBM)，仅转换时需要，
+不随应用部署。转换产物与对应 .joblib 同名 (后缀 .onnx)、放在同一目录；
+app1.py 启动时检测到 .onnx 文件且装有 onnxruntime 即自动改用编译后的
+推理会话，否则继续使用原 joblib 模型，两条路径的预测结果一致。
+"""
+import os
+
+import joblib
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 模型文件 -> 转换器类型
+MODELS_TO_CONVERT = {
+    'market_segment_lgbm_model.joblib': 'lightgbm',
+    'price_level_rf_model.joblib': 'sklearn',
+    'unit_price_rf_model.joblib': 'sklearn',
+}
+
+
+def convert_model(joblib_name, flavor):
+    """把单个 .joblib 模型转换为同名 .onnx 文件。"""
+    from skl2onnx.common.data_types import FloatTensorType
+
+    joblib_path = os.path.join(CURRENT_DIR, joblib_name)
+    model = joblib.load(joblib_path)
+    n_features = int(model.n_features_in_)
+    # 输入声明为 float32，与 app1.py 预测路径的缓冲区 dtype 一致
+    initial_types = [('input', FloatTensorType([None, n_features]))]
+
+    if flavor == 'lightgbm':
+        from onnxmltools import convert_lightgbm
+        onnx_model = convert_lightgbm(model, initial_types=initial_types)
+    else:
+        from skl2onnx import convert_sklearn
+        onnx_model = convert_sklearn(model, initial_types=initial_types)
+
+    onnx_path = os.path.splitext(joblib_path)[0] + '.onnx'
+    with open(onnx_path, 'wb') as onnx_file:
+        onnx_file.write(onnx_model.SerializeToString())
+    print(f"已导出: {onnx_path}")
+
+
+if __name__ == '__main__':
+    for name, model_flavor in MODELS_TO_CONVERT.items():
+        convert_model(name, model_flavor)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*- # 指定编码为 UTF-8
+"""离线重存脚本：用 pickle 协议 5、不压缩重新导出六个 .joblib 资源文件。
+
+用法: python resave_artifacts_protocol5.py
+
+协议 5 支持带外缓冲区，NumPy 数组的原始字节不再经过 pickle 指令流，
+反序列化明显更快；不压缩 (compress=0) 则让 app1.py 的 mmap_mode='r'
+加载路径可以直接映射数组页而无需解压。原文件会先备份为 *.joblib.bak。
+只需在模型更新后运行一次，应用端加载代码无需任何改动。
+"""
+import os
+import shutil
+
+import joblib
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ARTIFACTS_TO_RESAVE = (
+    'market_segment_lgbm_model.joblib',
+    'price_level_rf_model.joblib',
+    'unit_price_rf_model.joblib',
+    'regression_scaler.joblib',
+    'feature_names.joblib',
+    'mappings.joblib',
+)
+
+
+def resave_artifact(file_name):
+    """读入单个资源文件并以协议 5、不压缩原地重写，保留 .bak 备份。"""
+    file_path = os.path.join(CURRENT_DIR, file_name)
+    if not os.path.exists(file_path):
+        print(f"跳过 (不存在): {file_name}")
+        return
+    obj = joblib.load(file_path)
+    shutil.copy2(file_path, file_path + '.bak')
+    joblib.dump(obj, file_path, protocol=5, compress=0)
+    print(f"已重存: {file_name}")
+
+
+if __name__ == '__main__':
+    for artifact_name in ARTIFACTS_TO_RESAVE:
+        resave_artifact(artifact_name)